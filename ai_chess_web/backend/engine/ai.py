@@ -1,55 +1,385 @@
-from copy import deepcopy
+import time
 
+from array_board import ArrayBoard, TYPE_MASK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, color_bit
+from bitboard_generator import BitboardMoveGenerator
 from evaluation import Evaluation
 from move_generator import MoveGenerator
+from move_ordering import MoveOrderer, MVV_LVA_VALUES
+from transposition_table import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from zobrist import position_key
 
 PERSONALITIES = ["machine", "positionalist", "gambiteer", "grinder", "romantic"]
 
+MATE_SCORE = 10000
+# Scores beyond this are mates; no search gets anywhere near MATE_BOUND plies deep
+MATE_BOUND = MATE_SCORE - 1000
+# Quiescence skips captures that could not lift the score to alpha even with this much positional slack
+DELTA_MARGIN = 2
+# Scores are rounded to centipawns, so this is the narrowest window that can still fail high or low
+NULL_WINDOW = 0.01
+NULL_MOVE_REDUCTION = 2
+# Late move reductions apply to quiet moves from this index on, at remaining depths of at least LMR_MIN_DEPTH
+LMR_MOVE_INDEX = 3
+LMR_MIN_DEPTH = 3
+SEARCH_TECHNIQUES = ("pvs", "null_move", "lmr", "check_extensions")
 
-def find_best_move(board, color, depth):
-    best_move = None
-    best_score = float('-inf')
-    for move in MoveGenerator().get_legal_moves(board, color):
-        r1, c1, r2, c2 = move
-        new_board = deepcopy(board)
-        new_board[r2][c2] = new_board[r1][c1]
-        new_board[r1][c1] = "  "
 
-        score = minimax(new_board, depth - 1, float('-inf'), float('inf'), False, "b" if color == "w" else "w")
+def get_move_generator(use_bitboards=False):
+    return BitboardMoveGenerator() if use_bitboards else MoveGenerator()
 
-        if score > best_score:
-            best_score = score
-            best_move = move
 
-    return best_move
+def opponent(color):
+    return "b" if color == "w" else "w"
 
 
-def minimax(board, depth, alpha, beta, maximizing_player, color):
-    if depth == 0 or MoveGenerator().is_in_check(board, color):
-        return Evaluation().evaluate_board(board, color)
+def score_to_tt(score, ply):
+    # Mate scores count plies from the root; the table keeps them as distance from the stored node, so an entry
+    # is right whichever path, ply or earlier search reaches that node again
+    if score > MATE_BOUND:
+        return score + ply
+    if score < -MATE_BOUND:
+        return score - ply
+    return score
 
-    legal_moves = MoveGenerator().get_legal_moves(board, color)
-    if not legal_moves:
-        return Evaluation().evaluate_board(board, color)
 
-    best_score = float('-inf') if maximizing_player else float('inf')
-    next_color = "b" if color == "w" else "w"
+def score_from_tt(score, ply):
+    if score > MATE_BOUND:
+        return score - ply
+    if score < -MATE_BOUND:
+        return score + ply
+    return score
 
-    for move in legal_moves:
-        r1, c1, r2, c2 = move
-        new_board = deepcopy(board)
-        new_board[r2][c2] = new_board[r1][c1]
-        new_board[r1][c1] = "  "
 
-        score = minimax(new_board, depth - 1, alpha, beta, not maximizing_player, next_color)
+def has_non_pawn_material(board, color):
+    # Zugzwang guard for null-move pruning: with only king and pawns, passing can be the best "move"
+    own_bit = color_bit(color)
+    return any(board.pieces[own_bit | piece] for piece in (KNIGHT, BISHOP, ROOK, QUEEN))
 
-        best_score = max(best_score, score) if maximizing_player else min(best_score, score)
-        if maximizing_player:
+
+class SearchAborted(Exception):
+    pass
+
+
+class Search:
+    # Without an explicit soft limit, no new iteration starts once this share of the time budget is used,
+    # since the next iteration usually costs several times the previous one.
+    SOFT_LIMIT_RATIO = 0.5
+    STOP_CHECK_INTERVAL = 1024
+
+    def __init__(self, use_bitboards=False, tt_size_mb=16, personality="machine", use_move_ordering=True,
+                 pvs=False, null_move=False, lmr=False, check_extensions=False, evaluator=None, weights=None):
+        self.generator = get_move_generator(use_bitboards)
+        self.evaluator = evaluator or Evaluation()
+        self.tt = TranspositionTable(tt_size_mb)
+        self.orderer = MoveOrderer()
+        self.personality = personality
+        # Evaluation weights overriding the personality defaults, e.g. tuned ones from PersonalityManager
+        self.weights = weights
+        self.use_move_ordering = use_move_ordering
+        # Selectivity switches, all off by default so plain alpha-beta stays the reference search
+        self.use_pvs = pvs
+        self.use_null_move = null_move
+        self.use_lmr = lmr
+        self.use_check_extensions = check_extensions
+        self.root_depth = 0
+        self.nodes = 0
+        self.qnodes = 0
+        # Repetition and fifty-move draws met so far; they depend on the path, not just the position
+        self.path_draws = 0
+        self.pv = []
+        self.following_pv = False
+        self.iterations = []
+        self.start_time = 0
+        self.hard_deadline = None
+        self.node_limit = None
+        # Optional callable polled every STOP_CHECK_INTERVAL nodes; a true result aborts the search like a time limit
+        self.stop_check = None
+
+    def evaluate(self, board, color):
+        return self.evaluator.evaluate_board(board, color, self.personality, weights=self.weights)
+
+    def find_best_move(self, board, color, depth, time_limit=None, soft_time_limit=None, node_limit=None):
+        best_move, _ = self.iterative_deepening(board, color, depth, time_limit, soft_time_limit, node_limit)
+        return best_move
+
+    def iterative_deepening(self, board, color, max_depth, time_limit=None, soft_time_limit=None, node_limit=None,
+                            on_iteration=None):
+        # Search runs on a private array board so the caller's board is never mutated (or left half-made on abort)
+        board = ArrayBoard.from_list(board, color) if not isinstance(board, ArrayBoard) else board.copy()
+        self.begin_search(time_limit, node_limit)
+        if soft_time_limit is None and time_limit is not None:
+            soft_time_limit = time_limit * self.SOFT_LIMIT_RATIO
+
+        # Taken before searching: an aborted search unwinds without unmaking its moves, leaving the board half-made
+        legal_moves = self.generator.get_legal_moves(board, color)
+        if not legal_moves:
+            return None, None
+
+        best_move, best_score = None, None
+        for depth in range(1, max_depth + 1):
+            self.root_depth = depth
+            try:
+                move, score = self.search_root(board, color, depth)
+            except SearchAborted:
+                break
+            if move is None:
+                break  # no legal moves
+
+            best_move, best_score = move, score
+            self.pv = self.extract_pv(board, color, depth)
+            elapsed = time.perf_counter() - self.start_time
+            info = {
+                "depth": depth,
+                "score": score,
+                "pv": self.pv,
+                "nodes": self.nodes,
+                "qnodes": self.qnodes,
+                "time": round(elapsed, 3),
+                "nps": int(self.nodes / elapsed) if elapsed > 0 else 0,
+            }
+            self.iterations.append(info)
+            if on_iteration is not None:
+                on_iteration(info)
+            if soft_time_limit is not None and elapsed >= soft_time_limit:
+                break
+
+        if best_move is None:
+            # Not even depth 1 finished inside the budget: fall back to any legal move
+            best_move = legal_moves[0]
+        return best_move, best_score
+
+    def begin_search(self, time_limit=None, node_limit=None):
+        self.start_time = time.perf_counter()
+        self.hard_deadline = self.start_time + time_limit if time_limit is not None else None
+        self.node_limit = node_limit
+        self.nodes = 0
+        self.qnodes = 0
+        self.pv = []
+        self.iterations = []
+        self.orderer.clear()
+
+    def check_limits(self):
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchAborted()
+        if self.hard_deadline is not None and time.perf_counter() >= self.hard_deadline:
+            raise SearchAborted()
+        if self.stop_check is not None and self.nodes % self.STOP_CHECK_INTERVAL == 0 and self.stop_check():
+            raise SearchAborted()
+
+    def extract_pv(self, board, color, depth):
+        pv = []
+        undo = []
+        for _ in range(depth):
+            entry = self.tt.peek(position_key(board, color))
+            if entry is None or entry[4] not in self.generator.get_legal_moves(board, color):
+                break
+            move = entry[4]
+            pv.append(move)
+            undo.append((move, board.make_move(move)))
+            color = opponent(color)
+        for move, captured in reversed(undo):
+            board.unmake_move(move, captured)
+        return pv
+
+    def root_moves(self, board, color):
+        # Root move order for the next iteration: previous PV move, hash move, then the orderer's ranking
+        entry = self.tt.probe(position_key(board, color))
+        hash_move = entry[4] if entry is not None else None
+        legal_moves = self.generator.get_legal_moves(board, color)
+        self.following_pv = True
+        return self.order_moves(board, legal_moves, 0, hash_move, self.pv_move(0, legal_moves))
+
+    def search_root(self, board, color, depth):
+        key = position_key(board, color)
+        moves = self.root_moves(board, color)
+        alpha, beta = float('-inf'), float('inf')
+        best_move = None
+        best_score = float('-inf')
+
+        in_check = self.generator.is_in_check(board, color)
+        for index, move in enumerate(moves):
+            score = self.search_move(board, move, index, depth, alpha, beta, color, 0, in_check)
+            self.following_pv = False
+
+            if score > best_score:
+                best_score = score
+                best_move = move
             alpha = max(alpha, score)
+
+        if best_move is not None:
+            self.tt.store(key, depth, EXACT, best_score, best_move)
+        return best_move, best_score
+
+    def negamax(self, board, depth, alpha, beta, color, ply=1, allow_null=True):
+        # Scores are from the point of view of `color`, the side to move
+        self.nodes += 1
+        self.check_limits()
+        if board.halfmove_clock >= 100 or board.repetitions():
+            self.path_draws += 1
+            return 0  # a repeated position is scored as the draw it would lead to
+        key = position_key(board, color)
+        original_alpha = alpha
+        path_draws = self.path_draws
+
+        in_check = False
+        if self.use_null_move or self.use_lmr or self.use_check_extensions:
+            in_check = self.generator.is_in_check(board, color)
+            # Bounded so that a long series of checks cannot grow the tree without limit
+            if in_check and self.use_check_extensions and ply < 2 * self.root_depth:
+                depth += 1
+
+        entry = self.tt.probe(key)
+        hash_move = None
+        if entry is not None:
+            _, entry_depth, flag, score, hash_move = entry
+            score = score_from_tt(score, ply)
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return score
+                if flag == LOWER_BOUND:
+                    alpha = max(alpha, score)
+                elif flag == UPPER_BOUND:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        if depth <= 0:
+            return self.quiescence(board, alpha, beta, color, ply)
+
+        if (self.use_null_move and allow_null and not in_check and not self.following_pv
+                and depth > NULL_MOVE_REDUCTION and beta != float('inf') and has_non_pawn_material(board, color)):
+            # Pass the move: if a reduced search still fails high, a real move would too
+            board.make_null_move()
+            score = -self.negamax(board, depth - 1 - NULL_MOVE_REDUCTION, -beta, -beta + NULL_WINDOW,
+                                  opponent(color), ply + 1, allow_null=False)
+            board.unmake_null_move()
+            if score >= beta:
+                return beta
+
+        legal_moves = self.generator.get_legal_moves(board, color)
+        if not legal_moves:
+            return -MATE_SCORE + ply if self.generator.is_in_check(board, color) else 0
+
+        best_score = float('-inf')
+        best_move = None
+        cutoff_index = None
+        moves = self.order_moves(board, legal_moves, ply, hash_move, self.pv_move(ply, legal_moves))
+        for index, move in enumerate(moves):
+            score = self.search_move(board, move, index, depth, alpha, beta, color, ply, in_check)
+            self.following_pv = False
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                cutoff_index = index
+                self.orderer.record_cutoff(board, move, ply, depth)
+                break
+
+        self.orderer.record_node(depth, index + 1, cutoff_index)
+
+        if best_score <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_score >= beta:
+            flag = LOWER_BOUND
         else:
-            beta = min(beta, score)
+            flag = EXACT
+        if self.path_draws != path_draws:
+            # A draw by repetition below this node holds only for the path that led here; keep the best move for
+            # ordering but store no depth, so no other path to this position takes the score
+            depth = -1
+        self.tt.store(key, depth, flag, score_to_tt(best_score, ply), best_move)
+        return best_score
+
+    def search_move(self, board, move, index, depth, alpha, beta, color, ply, in_check):
+        # Scores one child. The first move always gets the full window; with PVS later moves get a null window
+        # and are re-searched only if they land inside (alpha, beta), and with LMR late quiet moves are first
+        # searched one ply shallower and re-searched at full depth if they beat alpha.
+        captured = board.make_move(move)
+        enemy = opponent(color)
+        new_depth = depth - 1
+        if index == 0:
+            score = -self.negamax(board, new_depth, -beta, -alpha, enemy, ply + 1)
+        else:
+            window = alpha + NULL_WINDOW if self.use_pvs else beta
+            reduction = 0
+            if (self.use_lmr and not captured and len(move) == 4 and not in_check and index >= LMR_MOVE_INDEX
+                    and depth >= LMR_MIN_DEPTH and not self.is_killer(move, ply)
+                    and not self.generator.is_in_check(board, enemy)):
+                reduction = 1
+            score = -self.negamax(board, new_depth - reduction, -window, -alpha, enemy, ply + 1)
+            if reduction and score > alpha:
+                score = -self.negamax(board, new_depth, -window, -alpha, enemy, ply + 1)
+            if window != beta and alpha < score < beta:
+                score = -self.negamax(board, new_depth, -beta, -alpha, enemy, ply + 1)
+        board.unmake_move(move, captured)
+        return score
+
+    def is_killer(self, move, ply):
+        return ply < self.orderer.max_ply and move in self.orderer.killers[ply]
+
+    def quiescence(self, board, alpha, beta, color, ply):
+        # Captures only (all evasions when in check) until the position is quiet; nodes count in both counters
+        self.nodes += 1
+        self.qnodes += 1
+        self.check_limits()
+
+        if self.generator.is_in_check(board, color):
+            moves = self.generator.get_legal_moves(board, color)
+            if not moves:
+                return -MATE_SCORE + ply
+            best_score = float('-inf')
+            stand_pat = None
+        else:
+            stand_pat = self.evaluate(board, color)
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+            best_score = stand_pat
+            moves = self.generator.get_legal_moves(board, color, captures_only=True)
+
+        squares = board.squares
+        for move in self.orderer.order(board, moves, ply):
+            if stand_pat is not None:
+                # an empty target square means en passant or a promotion push
+                gain = MVV_LVA_VALUES[squares[move[2] * 8 + move[3]] & TYPE_MASK] or MVV_LVA_VALUES[PAWN]
+                if len(move) == 5:
+                    gain += MVV_LVA_VALUES[move[4]] - MVV_LVA_VALUES[PAWN]
+                if stand_pat + gain + DELTA_MARGIN < alpha:
+                    continue  # delta pruning
+
+            captured = board.make_move(move)
+            score = -self.quiescence(board, -beta, -alpha, opponent(color), ply + 1)
+            board.unmake_move(move, captured)
+
+            if score > best_score:
+                best_score = score
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        return best_score
+
+    def pv_move(self, ply, moves):
+        # Only the leftmost path of an iteration walks the previous PV; everything else is off it
+        if self.following_pv and ply < len(self.pv) and self.pv[ply] in moves:
+            return self.pv[ply]
+        self.following_pv = False
+        return None
+
+    def order_moves(self, board, moves, ply, hash_move=None, pv_move=None):
+        if self.use_move_ordering:
+            return self.orderer.order(board, moves, ply, hash_move, pv_move)
+        # Unordered baseline for comparison: PV and hash move first, the rest in generator order
+        for first in (hash_move, pv_move):
+            if first is not None and first in moves:
+                moves = [first] + [move for move in moves if move != first]
+        return moves
 
-        if beta <= alpha:
-            break
 
-    return best_score
+def find_best_move(board, color, depth, use_bitboards=False, tt_size_mb=16, time_limit=None, soft_time_limit=None,
+                   node_limit=None, pvs=False, null_move=False, lmr=False, check_extensions=False):
+    search = Search(use_bitboards=use_bitboards, tt_size_mb=tt_size_mb, pvs=pvs, null_move=null_move, lmr=lmr,
+                    check_extensions=check_extensions)
+    return search.find_best_move(board, color, depth, time_limit, soft_time_limit, node_limit)
@@ -0,0 +1,347 @@
+from piece_square_tables import signed_tables
+from zobrist import PIECE_KEYS, CASTLING_KEYS, EP_KEYS, compute_key, compute_pawn_key
+
+EMPTY = 0
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(1, 7)
+BLACK = 8
+TYPE_MASK = 7
+
+PIECE_CODES = {
+    "wP": PAWN, "wN": KNIGHT, "wB": BISHOP, "wR": ROOK, "wQ": QUEEN, "wK": KING,
+    "bP": BLACK | PAWN, "bN": BLACK | KNIGHT, "bB": BLACK | BISHOP,
+    "bR": BLACK | ROOK, "bQ": BLACK | QUEEN, "bK": BLACK | KING,
+}
+PIECE_NAMES = {code: name for name, code in PIECE_CODES.items()}
+PIECE_NAMES[EMPTY] = "  "
+PAWN_CODES = (PAWN, BLACK | PAWN)
+MATERIAL, POSITIONAL = signed_tables(PIECE_NAMES)
+
+# FEN letters: upper case for white, lower case for black
+FEN_CODES = {name[1] if name[0] == "w" else name[1].lower(): code for name, code in PIECE_CODES.items()}
+FEN_LETTERS = {code: letter for letter, code in FEN_CODES.items()}
+PROMOTION_PIECES = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+CASTLING_LETTERS = ((WHITE_KINGSIDE, "K"), (WHITE_QUEENSIDE, "Q"), (BLACK_KINGSIDE, "k"), (BLACK_QUEENSIDE, "q"))
+# Rights kept when a move starts or ends on a square: moving a king or rook, or capturing a rook, drops them
+CASTLING_MASKS = [15] * 64
+CASTLING_MASKS[60] ^= WHITE_KINGSIDE | WHITE_QUEENSIDE  # e1
+CASTLING_MASKS[63] ^= WHITE_KINGSIDE  # h1
+CASTLING_MASKS[56] ^= WHITE_QUEENSIDE  # a1
+CASTLING_MASKS[4] ^= BLACK_KINGSIDE | BLACK_QUEENSIDE  # e8
+CASTLING_MASKS[7] ^= BLACK_KINGSIDE  # h8
+CASTLING_MASKS[0] ^= BLACK_QUEENSIDE  # a8
+# King destination square -> (rook from, rook to)
+CASTLING_ROOKS = {62: (63, 61), 58: (56, 59), 6: (7, 5), 2: (0, 3)}
+
+
+def color_bit(color):
+    return 0 if color == "w" else BLACK
+
+
+def square_index(row, col):
+    return row * 8 + col
+
+
+def square_name(sq):
+    return "abcdefgh"[sq & 7] + str(8 - (sq >> 3))
+
+
+def parse_square(name):
+    return (8 - int(name[1])) * 8 + "abcdefgh".index(name[0])
+
+
+def compute_scores(board):
+    material = positional = 0
+    for code, squares in board.pieces.items():
+        for sq in squares:
+            material += MATERIAL[code]
+            positional += POSITIONAL[code][sq]
+    return material, positional
+
+
+def infer_castling(squares):
+    # Rights for a bare placement: a side keeps a right while its king and that rook stand on their home squares
+    castling = 0
+    for right, king_sq, king, rook_sq, rook in ((WHITE_KINGSIDE, 60, KING, 63, ROOK),
+                                                (WHITE_QUEENSIDE, 60, KING, 56, ROOK),
+                                                (BLACK_KINGSIDE, 4, BLACK | KING, 7, BLACK | ROOK),
+                                                (BLACK_QUEENSIDE, 4, BLACK | KING, 0, BLACK | ROOK)):
+        if squares[king_sq] == king and squares[rook_sq] == rook:
+            castling |= right
+    return castling
+
+
+class ArrayBoard:
+    # Square 0 is a8 and square 63 is h1, so index = row * 8 + col matches the list-of-lists layout.
+    # Besides the placement the board is a full position: side to move, castling rights, en passant square and
+    # move counters. make_move keeps everything up to date and pushes the irreversible state on `history`, which
+    # unmake_move pops; the stacked Zobrist keys double as the repetition record.
+    # Moves are (r1, c1, r2, c2) tuples, plus a fifth element with the piece type for promotions. Castling is
+    # the king's two-square move and en passant a pawn's diagonal move to `ep_square`.
+
+    def __init__(self):
+        self.squares = [EMPTY] * 64
+        self.pieces = {code: set() for code in PIECE_NAMES if code != EMPTY}
+        self.bitboards = [0] * 16  # indexed by piece code, bit n = square n
+        self.side = "w"
+        self.castling = 0
+        self.ep_square = None  # square a pawn just skipped over, or None
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self.history = []  # (castling, ep_square, halfmove_clock, hash, pawn_hash, material, positional) per move
+        self.hash = 0  # Zobrist key of placement, castling rights and ep file, see zobrist.position_key for side
+        self.pawn_hash = 0  # same keys restricted to pawns, for the pawn-structure cache
+        # White-minus-black running totals of piece values and piece-square bonuses
+        self.material = 0
+        self.positional = 0
+
+    @classmethod
+    def from_list(cls, board, side="w", castling=None, ep_square=None, halfmove_clock=0, fullmove_number=1):
+        # Without explicit rights they are inferred from king and rook placement
+        array_board = cls()
+        for row in range(8):
+            for col in range(8):
+                code = PIECE_CODES.get(board[row][col], EMPTY)
+                if code:
+                    array_board.put(row * 8 + col, code)
+        array_board.side = side
+        array_board.castling = infer_castling(array_board.squares) if castling is None else castling
+        array_board.ep_square = ep_square
+        array_board.halfmove_clock = halfmove_clock
+        array_board.fullmove_number = fullmove_number
+        array_board.refresh()
+        return array_board
+
+    @classmethod
+    def from_fen(cls, fen):
+        # Only the placement is required; missing fields default to white to move, no rights and fresh clocks.
+        # Anything malformed raises ValueError.
+        fields = fen.split()
+        if not 1 <= len(fields) <= 6:
+            raise ValueError(f"FEN must have 1 to 6 fields: {fen!r}")
+        ranks = fields[0].split("/")
+        if len(ranks) != 8:
+            raise ValueError(f"FEN placement must have 8 ranks: {fields[0]!r}")
+        array_board = cls()
+        for row, rank in enumerate(ranks):
+            col = 0
+            for char in rank:
+                if char in "12345678":
+                    col += int(char)
+                elif char in FEN_CODES:
+                    if col < 8:
+                        array_board.put(row * 8 + col, FEN_CODES[char])
+                    col += 1
+                else:
+                    raise ValueError(f"unknown piece {char!r} in FEN placement")
+            if col != 8:
+                raise ValueError(f"FEN rank {8 - row} must have 8 squares: {rank!r}")
+
+        array_board.side = fields[1] if len(fields) > 1 else "w"
+        if array_board.side not in ("w", "b"):
+            raise ValueError(f"FEN side to move must be 'w' or 'b': {array_board.side!r}")
+        rights = fields[2] if len(fields) > 2 else "-"
+        if rights != "-" and any(letter not in "KQkq" for letter in rights):
+            raise ValueError(f"FEN castling rights must be '-' or letters from 'KQkq': {rights!r}")
+        # A right whose king or rook has left its home square cannot be used, whatever the FEN claims
+        array_board.castling = sum(right for right, letter in CASTLING_LETTERS if letter in rights) \
+            & infer_castling(array_board.squares)
+        ep = fields[3] if len(fields) > 3 else "-"
+        if ep != "-" and (len(ep) != 2 or ep[0] not in "abcdefgh" or ep[1] not in "36"):
+            raise ValueError(f"FEN en passant square must be '-' or on rank 3 or 6: {ep!r}")
+        array_board.ep_square = parse_square(ep) if ep != "-" else None
+        for index, name in ((4, "halfmove clock"), (5, "fullmove number")):
+            if len(fields) > index and not fields[index].isdigit():
+                raise ValueError(f"FEN {name} must be a non-negative integer: {fields[index]!r}")
+        array_board.halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+        array_board.fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+        array_board.refresh()
+        return array_board
+
+    @classmethod
+    def coerce(cls, board, side="w"):
+        return board if isinstance(board, cls) else cls.from_list(board, side)
+
+    def put(self, sq, code):
+        self.squares[sq] = code
+        self.pieces[code].add(sq)
+        self.bitboards[code] |= 1 << sq
+
+    def refresh(self):
+        # Recomputes the keys and running scores from scratch after the position was set up directly
+        self.hash = compute_key(self)
+        self.pawn_hash = compute_pawn_key(self, PAWN_CODES)
+        self.material, self.positional = compute_scores(self)
+
+    def to_list(self):
+        names = PIECE_NAMES
+        squares = self.squares
+        return [[names[squares[row * 8 + col]] for col in range(8)] for row in range(8)]
+
+    def to_fen(self):
+        ranks = []
+        for row in range(8):
+            rank, empty = "", 0
+            for code in self.squares[row * 8:row * 8 + 8]:
+                if code:
+                    rank += (str(empty) if empty else "") + FEN_LETTERS[code]
+                    empty = 0
+                else:
+                    empty += 1
+            ranks.append(rank + (str(empty) if empty else ""))
+        rights = "".join(letter for right, letter in CASTLING_LETTERS if self.castling & right) or "-"
+        ep = square_name(self.ep_square) if self.ep_square is not None else "-"
+        return f"{'/'.join(ranks)} {self.side} {rights} {ep} {self.halfmove_clock} {self.fullmove_number}"
+
+    def copy(self):
+        clone = ArrayBoard()
+        clone.squares = self.squares[:]
+        clone.pieces = {code: set(squares) for code, squares in self.pieces.items()}
+        clone.bitboards = self.bitboards[:]
+        clone.side = self.side
+        clone.castling = self.castling
+        clone.ep_square = self.ep_square
+        clone.halfmove_clock = self.halfmove_clock
+        clone.fullmove_number = self.fullmove_number
+        clone.history = self.history[:]
+        clone.hash = self.hash
+        clone.pawn_hash = self.pawn_hash
+        clone.material = self.material
+        clone.positional = self.positional
+        return clone
+
+    def piece_at(self, row, col):
+        return PIECE_NAMES[self.squares[row * 8 + col]]
+
+    def king_square(self, color):
+        kings = self.pieces[color_bit(color) | KING]
+        return next(iter(kings)) if kings else None
+
+    def _move_piece(self, piece, from_sq, to_sq):
+        piece_set = self.pieces[piece]
+        piece_set.discard(from_sq)
+        piece_set.add(to_sq)
+        self.bitboards[piece] ^= (1 << from_sq) | (1 << to_sq)
+        self.squares[to_sq] = piece
+        self.squares[from_sq] = EMPTY
+
+    def make_move(self, move):
+        # Returns the captured piece code (the pawn for en passant), which unmake_move takes back
+        from_sq = move[0] * 8 + move[1]
+        to_sq = move[2] * 8 + move[3]
+        squares = self.squares
+        pieces = self.pieces
+        bitboards = self.bitboards
+        piece = squares[from_sq]
+        piece_type = piece & TYPE_MASK
+        captured = squares[to_sq]
+        capture_sq = to_sq
+        self.history.append((self.castling, self.ep_square, self.halfmove_clock, self.hash, self.pawn_hash,
+                             self.material, self.positional))
+
+        key = self.hash ^ CASTLING_KEYS[self.castling]
+        if self.ep_square is not None:
+            key ^= EP_KEYS[self.ep_square & 7]
+            if piece_type == PAWN and to_sq == self.ep_square:
+                capture_sq = (from_sq & ~7) | (to_sq & 7)  # the pawn beside us, on our starting row
+                captured = squares[capture_sq]
+                squares[capture_sq] = EMPTY
+
+        if captured:
+            pieces[captured].discard(capture_sq)
+            bitboards[captured] ^= 1 << capture_sq
+            key ^= PIECE_KEYS[captured][capture_sq]
+            self.material -= MATERIAL[captured]
+            self.positional -= POSITIONAL[captured][capture_sq]
+            if captured & TYPE_MASK == PAWN:
+                self.pawn_hash ^= PIECE_KEYS[captured][capture_sq]
+
+        self._move_piece(piece, from_sq, to_sq)
+        key ^= PIECE_KEYS[piece][from_sq] ^ PIECE_KEYS[piece][to_sq]
+        self.positional += POSITIONAL[piece][to_sq] - POSITIONAL[piece][from_sq]
+        self.ep_square = None
+        if piece_type == PAWN:
+            self.pawn_hash ^= PIECE_KEYS[piece][from_sq] ^ PIECE_KEYS[piece][to_sq]
+            if len(move) == 5:
+                promoted = (piece & BLACK) | move[4]
+                pieces[piece].discard(to_sq)
+                bitboards[piece] ^= 1 << to_sq
+                self.pawn_hash ^= PIECE_KEYS[piece][to_sq]
+                self.put(to_sq, promoted)
+                key ^= PIECE_KEYS[piece][to_sq] ^ PIECE_KEYS[promoted][to_sq]
+                self.material += MATERIAL[promoted] - MATERIAL[piece]
+                self.positional += POSITIONAL[promoted][to_sq] - POSITIONAL[piece][to_sq]
+            elif to_sq - from_sq in (16, -16):
+                self.ep_square = (from_sq + to_sq) >> 1
+                key ^= EP_KEYS[to_sq & 7]
+        elif piece_type == KING and to_sq - from_sq in (2, -2):
+            rook_from, rook_to = CASTLING_ROOKS[to_sq]
+            rook = squares[rook_from]
+            self._move_piece(rook, rook_from, rook_to)
+            key ^= PIECE_KEYS[rook][rook_from] ^ PIECE_KEYS[rook][rook_to]
+            self.positional += POSITIONAL[rook][rook_to] - POSITIONAL[rook][rook_from]
+
+        self.castling &= CASTLING_MASKS[from_sq] & CASTLING_MASKS[to_sq]
+        self.hash = key ^ CASTLING_KEYS[self.castling]
+        self.halfmove_clock = 0 if piece_type == PAWN or captured else self.halfmove_clock + 1
+        if self.side == "b":
+            self.fullmove_number += 1
+        self.side = "b" if self.side == "w" else "w"
+        return captured
+
+    def unmake_move(self, move, captured):
+        from_sq = move[0] * 8 + move[1]
+        to_sq = move[2] * 8 + move[3]
+        squares = self.squares
+        (self.castling, self.ep_square, self.halfmove_clock, self.hash, self.pawn_hash,
+         self.material, self.positional) = self.history.pop()
+        self.side = "b" if self.side == "w" else "w"
+        if self.side == "b":
+            self.fullmove_number -= 1
+
+        piece = squares[to_sq]
+        if len(move) == 5:
+            self.pieces[piece].discard(to_sq)
+            self.bitboards[piece] ^= 1 << to_sq
+            piece = (piece & BLACK) | PAWN
+            self.put(to_sq, piece)
+        self._move_piece(piece, to_sq, from_sq)
+        piece_type = piece & TYPE_MASK
+
+        if piece_type == KING and to_sq - from_sq in (2, -2):
+            rook_from, rook_to = CASTLING_ROOKS[to_sq]
+            self._move_piece(squares[rook_to], rook_to, rook_from)
+        if captured:
+            capture_sq = to_sq
+            if piece_type == PAWN and to_sq == self.ep_square:
+                capture_sq = (from_sq & ~7) | (to_sq & 7)
+            self.put(capture_sq, captured)
+
+    def make_null_move(self):
+        # Passes the turn (null-move pruning); only side to move and the en passant square change
+        self.history.append((self.castling, self.ep_square, self.halfmove_clock, self.hash, self.pawn_hash,
+                             self.material, self.positional))
+        if self.ep_square is not None:
+            self.hash ^= EP_KEYS[self.ep_square & 7]
+            self.ep_square = None
+        self.halfmove_clock += 1
+        self.side = "b" if self.side == "w" else "w"
+
+    def unmake_null_move(self):
+        (self.castling, self.ep_square, self.halfmove_clock, self.hash, self.pawn_hash,
+         self.material, self.positional) = self.history.pop()
+        self.side = "b" if self.side == "w" else "w"
+
+    def repetitions(self):
+        # How often the current position occurred before, looking back only as far as the last pawn move or
+        # capture. Positions with the same side to move sit two plies apart on the history stack.
+        count = 0
+        history = self.history
+        for ply in range(2, min(self.halfmove_clock, len(history)) + 1, 2):
+            if history[-ply][3] == self.hash:
+                count += 1
+        return count
+
+    def is_fifty_move_draw(self):
+        return self.halfmove_clock >= 100
@@ -0,0 +1,74 @@
+from array_board import ArrayBoard, EMPTY, BLACK, TYPE_MASK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+from move_generator import KNIGHT_SQUARES, KING_SQUARES, PAWN_ATTACK_SQUARES, ROOK_RAYS, BISHOP_RAYS
+
+PIECE_LETTERS = ["", "P", "N", "B", "R", "Q", "K"]
+
+
+class AttackMap:
+    # One pass over the pieces of both sides: for every square, how many pieces of each type attack it,
+    # plus the pseudo-legal move count of each side. No legality testing is done.
+
+    def __init__(self, board):
+        board = ArrayBoard.coerce(board)
+        self.counts = {"w": [[0] * 7 for _ in range(64)], "b": [[0] * 7 for _ in range(64)]}
+        self.mobility = {"w": 0, "b": 0}
+
+        squares = board.squares
+        for code, piece_squares in board.pieces.items():
+            if not piece_squares:
+                continue
+            color = "b" if code & BLACK else "w"
+            own = code & BLACK
+            piece_type = code & TYPE_MASK
+            counts = self.counts[color]
+            moves = 0
+
+            for sq in piece_squares:
+                if piece_type == PAWN:
+                    for target in PAWN_ATTACK_SQUARES[color][sq]:
+                        counts[target][PAWN] += 1
+                        if squares[target] and squares[target] & BLACK != own:
+                            moves += 1
+                    moves += self._pawn_pushes(squares, sq, color)
+                    continue
+
+                if piece_type in (KNIGHT, KING):
+                    targets = KNIGHT_SQUARES[sq] if piece_type == KNIGHT else KING_SQUARES[sq]
+                else:
+                    targets = []
+                    rays = []
+                    if piece_type in (ROOK, QUEEN):
+                        rays += ROOK_RAYS[sq]
+                    if piece_type in (BISHOP, QUEEN):
+                        rays += BISHOP_RAYS[sq]
+                    for ray in rays:
+                        for target in ray:
+                            targets.append(target)
+                            if squares[target]:
+                                break
+
+                for target in targets:
+                    counts[target][piece_type] += 1
+                    if squares[target] == EMPTY or squares[target] & BLACK != own:
+                        moves += 1
+            self.mobility[color] += moves
+
+    def _pawn_pushes(self, squares, sq, color):
+        row, col = divmod(sq, 8)
+        direction = -1 if color == "w" else 1
+        start_row = 6 if color == "w" else 1
+        if not 0 <= row + direction < 8 or squares[sq + 8 * direction] != EMPTY:
+            return 0
+        if row == start_row and squares[sq + 16 * direction] == EMPTY:
+            return 2
+        return 1
+
+    def attackers(self, sq, color):
+        counts = self.counts[color][sq]
+        return {PIECE_LETTERS[piece_type]: counts[piece_type] for piece_type in range(PAWN, KING + 1)}
+
+    def attack_count(self, sq, color):
+        return sum(self.counts[color][sq])
+
+    def attacked_squares(self, color):
+        return [sq for sq in range(64) if any(self.counts[color][sq])]
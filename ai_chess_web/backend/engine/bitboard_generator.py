@@ -0,0 +1,233 @@
+from array_board import ArrayBoard, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, PROMOTION_PIECES, color_bit
+from move_generator import MoveGenerator, ROOK_RAYS, BISHOP_RAYS
+
+# Bit n is square n of ArrayBoard (a8 = bit 0, h1 = bit 63), so ">> 8" moves one row towards rank 8.
+FULL = (1 << 64) - 1
+FILE_A = sum(1 << (row * 8) for row in range(8))
+FILE_H = FILE_A << 7
+NOT_FILE_A = FULL ^ FILE_A
+NOT_FILE_H = FULL ^ FILE_H
+ROW_2 = 0xFF << (2 * 8)  # black pawns after a single push from their start row
+ROW_5 = 0xFF << (5 * 8)  # white pawns after a single push from their start row
+PROMOTION_ROWS = {"w": 0xFF, "b": 0xFF << (7 * 8)}
+
+
+ROW_BITS = [[tuple(row * 8 + col for col in range(8) if byte >> col & 1) for byte in range(256)] for row in range(8)]
+MOVE_TUPLES = [[(r1, c1, r2, c2) for r2 in range(8) for c2 in range(8)] for r1 in range(8) for c1 in range(8)]
+
+
+def bit_squares(bb):
+    squares = []
+    while bb:
+        row = (bb & -bb).bit_length() - 1 >> 3
+        shift = row << 3
+        squares += ROW_BITS[row][bb >> shift & 0xFF]
+        bb &= ~(0xFF << shift)
+    return squares
+
+
+def byteswap(bb):
+    return int.from_bytes(bb.to_bytes(8, "little"), "big")
+
+
+def _step_table(offsets):
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        bb = 0
+        for dr, dc in offsets:
+            r, c = row + dr, col + dc
+            if 0 <= r < 8 and 0 <= c < 8:
+                bb |= 1 << (r * 8 + c)
+        table.append(bb)
+    return table
+
+
+def _line_mask(sq, dr, dc):
+    row, col = divmod(sq, 8)
+    bb = 0
+    for sign in (-1, 1):
+        r, c = row + sign * dr, col + sign * dc
+        while 0 <= r < 8 and 0 <= c < 8:
+            bb |= 1 << (r * 8 + c)
+            r += sign * dr
+            c += sign * dc
+    return bb
+
+
+def _first_rank_attacks():
+    # FIRST_RANK[col][occupancy] -> attacked columns on a single row, used for rank sliders
+    table = [[0] * 256 for _ in range(8)]
+    for col in range(8):
+        for occ in range(256):
+            attacks = 0
+            for step in (-1, 1):
+                c = col + step
+                while 0 <= c < 8:
+                    attacks |= 1 << c
+                    if occ & (1 << c):
+                        break
+                    c += step
+            table[col][occ] = attacks
+    return table
+
+
+KNIGHT_ATTACKS = _step_table([(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)])
+KING_ATTACKS = _step_table([(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)])
+FILE_MASKS = [_line_mask(sq, 1, 0) for sq in range(64)]
+DIAGONAL_MASKS = [_line_mask(sq, 1, 1) for sq in range(64)]
+ANTI_DIAGONAL_MASKS = [_line_mask(sq, 1, -1) for sq in range(64)]
+FIRST_RANK = _first_rank_attacks()
+
+
+def line_attacks(occupied, sq, mask):
+    # Hyperbola quintessence: o ^ (o - 2s) in both directions, the reverse one via byteswap
+    # (valid for lines holding at most one square per row: files and diagonals)
+    slider = 1 << sq
+    o = occupied & mask
+    forward = (o - 2 * slider) & FULL
+    reverse = (byteswap(o) - 2 * byteswap(slider)) & FULL
+    return (forward ^ byteswap(reverse)) & mask
+
+
+def rank_attacks(occupied, sq):
+    row, col = divmod(sq, 8)
+    shift = row * 8
+    return FIRST_RANK[col][(occupied >> shift) & 0xFF] << shift
+
+
+ROOK_MASKS = [FILE_MASKS[sq] | (0xFF << (sq & ~7)) ^ (1 << sq) for sq in range(64)]
+BISHOP_MASKS = [DIAGONAL_MASKS[sq] | ANTI_DIAGONAL_MASKS[sq] for sq in range(64)]
+# Per-square {relevant occupancy: attacks} tables filled on first use; Python's dict hashing
+# plays the role of the magic multiply in a C engine.
+ROOK_TABLE = [{} for _ in range(64)]
+BISHOP_TABLE = [{} for _ in range(64)]
+
+
+def rook_attacks(occupied, sq):
+    key = occupied & ROOK_MASKS[sq]
+    attacks = ROOK_TABLE[sq].get(key)
+    if attacks is None:
+        attacks = ROOK_TABLE[sq][key] = line_attacks(key, sq, FILE_MASKS[sq]) | rank_attacks(key, sq)
+    return attacks
+
+
+def bishop_attacks(occupied, sq):
+    key = occupied & BISHOP_MASKS[sq]
+    attacks = BISHOP_TABLE[sq].get(key)
+    if attacks is None:
+        attacks = BISHOP_TABLE[sq][key] = (line_attacks(key, sq, DIAGONAL_MASKS[sq])
+                                           | line_attacks(key, sq, ANTI_DIAGONAL_MASKS[sq]))
+    return attacks
+
+
+def queen_attacks(occupied, sq):
+    return rook_attacks(occupied, sq) | bishop_attacks(occupied, sq)
+
+
+# Per-square {target set: move tuples} caches; attack sets repeat constantly across a search
+TARGET_MOVES = [{} for _ in range(64)]
+# Slider targets come out in the scanning generator's ray order: rook rays (up, down, left, right), then bishop
+# rays, each walked outwards. Knight and king steps are already in square order there.
+RAY_ORDER = [{to_sq: index for index, to_sq in enumerate(sq for ray in ROOK_RAYS[from_sq] + BISHOP_RAYS[from_sq]
+                                                          for sq in ray)}
+             for from_sq in range(64)]
+SLIDER_TARGET_MOVES = [{} for _ in range(64)]
+
+
+def target_moves(from_sq, targets):
+    moves = TARGET_MOVES[from_sq].get(targets)
+    if moves is None:
+        from_moves = MOVE_TUPLES[from_sq]
+        moves = TARGET_MOVES[from_sq][targets] = [from_moves[to_sq] for to_sq in bit_squares(targets)]
+    return moves
+
+
+def slider_moves(from_sq, targets):
+    moves = SLIDER_TARGET_MOVES[from_sq].get(targets)
+    if moves is None:
+        from_moves = MOVE_TUPLES[from_sq]
+        order = RAY_ORDER[from_sq]
+        moves = SLIDER_TARGET_MOVES[from_sq][targets] = [from_moves[to_sq] for to_sq in
+                                                         sorted(bit_squares(targets), key=order.__getitem__)]
+    return moves
+
+
+class BitboardMoveGenerator(MoveGenerator):
+    # Drop-in backend for MoveGenerator: the same pseudo-legal moves in the same order (pieces by square, each
+    # piece's targets in the scanning generator's direction order), so search behaves the same on either backend.
+
+    def get_all_moves(self, board, color):
+        board = ArrayBoard.coerce(board)
+        bitboards = board.bitboards
+        pieces = board.pieces
+        own_bit = color_bit(color)
+        enemy_bit = own_bit ^ BLACK
+
+        own = 0
+        enemy = 0
+        for piece in (PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING):
+            own |= bitboards[own_bit | piece]
+            enemy |= bitboards[enemy_bit | piece]
+        occupied = own | enemy
+        targets = FULL ^ own
+
+        by_square = self.get_pawn_bitboard_moves(bitboards[own_bit | PAWN], color, occupied, enemy, board.ep_square)
+        for sq in pieces[own_bit | KNIGHT]:
+            by_square[sq] = target_moves(sq, KNIGHT_ATTACKS[sq] & targets)
+        for sq in pieces[own_bit | BISHOP]:
+            by_square[sq] = slider_moves(sq, bishop_attacks(occupied, sq) & targets)
+        for sq in pieces[own_bit | ROOK]:
+            by_square[sq] = slider_moves(sq, rook_attacks(occupied, sq) & targets)
+        for sq in pieces[own_bit | QUEEN]:
+            by_square[sq] = slider_moves(sq, queen_attacks(occupied, sq) & targets)
+        for sq in pieces[own_bit | KING]:
+            by_square[sq] = target_moves(sq, KING_ATTACKS[sq] & targets)
+
+        moves = []
+        for sq in sorted(by_square):
+            moves += by_square[sq]
+        if board.castling:
+            moves += self.get_castling_moves(board, color)
+        return moves
+
+    def get_pawn_bitboard_moves(self, pawns, color, occupied, enemy, ep_square=None):
+        # Moves per pawn square: push, double push, capture towards file a, capture towards file h
+        empty = FULL ^ occupied
+        if ep_square is not None:
+            enemy |= 1 << ep_square
+        if color == "w":
+            single = (pawns >> 8) & empty
+            double = ((single & ROW_5) >> 8) & empty
+            left = (pawns >> 9) & NOT_FILE_H & enemy
+            right = (pawns >> 7) & NOT_FILE_A & enemy
+            sets = ((single, 8), (double, 16), (left, 9), (right, 7))
+        else:
+            single = (pawns << 8) & empty
+            double = ((single & ROW_2) << 8) & empty
+            left = (pawns << 7) & NOT_FILE_H & enemy
+            right = (pawns << 9) & NOT_FILE_A & enemy
+            sets = ((single, -8), (double, -16), (left, -7), (right, -9))
+
+        by_square = {}
+        promotion_row = PROMOTION_ROWS[color]
+        for bb, offset in sets:
+            for to_sq in bit_squares(bb):
+                from_sq = to_sq + offset
+                move = MOVE_TUPLES[from_sq][to_sq]
+                pawn_moves = by_square.get(from_sq)
+                if pawn_moves is None:
+                    pawn_moves = by_square[from_sq] = []
+                if 1 << to_sq & promotion_row:
+                    pawn_moves += [move + (piece,) for piece in PROMOTION_PIECES]
+                else:
+                    pawn_moves.append(move)
+        return by_square
+
+
+def cross_check(board, color):
+    # Returns (missing, extra, same_order): moves only the scanning generator finds, moves only the bitboard one
+    # finds, and whether both listed the moves in the same order
+    expected = MoveGenerator().get_all_moves(board, color)
+    actual = BitboardMoveGenerator().get_all_moves(board, color)
+    return sorted(set(expected) - set(actual)), sorted(set(actual) - set(expected)), expected == actual
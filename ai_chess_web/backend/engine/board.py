@@ -1,10 +1,19 @@
+from array_board import CASTLING_LETTERS, CASTLING_MASKS, PIECE_NAMES
+
+
 class Board:
+    # List boards carry only the placement. Castling rights, the en passant square and the move counters live in
+    # a separate state dict (see initial_state) that move_piece keeps up to date, and to_fen hands both to the
+    # engine, so nothing has to be guessed from where the pieces stand.
 
     def initialize_board(self):
         return [["bR", "bN", "bB", "bQ", "bK", "bB", "bN", "bR"], ["bP"] * 8, ["  "] * 8, ["  "] * 8, ["  "] * 8,
                 ["  "] * 8, ["wP"] * 8,
                 ["wR", "wN", "wB", "wQ", "wK", "wB", "wN", "wR"]]
 
+    def initial_state(self):
+        return {"castling": "KQkq", "ep_square": None, "halfmove_clock": 0, "fullmove_number": 1}
+
     def print_board(self, board):
         print("  a  b  c  d  e  f  g  h")
         for i, row in enumerate(board):
@@ -18,13 +27,66 @@ class Board:
         row = 8 - int(pos[1])
         return row, col
 
+    def index_to_coord(self, row, col):
+        return "abcdefgh"[col] + str(8 - row)
+
     def get_piece(self, board, pos):
         row, col = self.coord_to_index(pos)
         return board[row][col]
 
-    def move_piece(self, board, start, end):
+    def move_piece(self, board, start, end, promotion="Q", state=None):
+        # Applies any legal move: a king's two-square move also moves the rook, a pawn moving diagonally onto an
+        # empty square takes en passant, and a pawn reaching the last rank becomes `promotion`. With a state dict,
+        # its rights, en passant square and counters are updated as well.
         start_row, start_col = self.coord_to_index(start)
         end_row, end_col = self.coord_to_index(end)
         piece = board[start_row][start_col]
+        captured = board[end_row][end_col].strip()
         board[start_row][start_col] = "  "
+
+        pawn_move = piece[1] == "P"
+        if pawn_move:
+            if start_col != end_col and not captured:
+                board[start_row][end_col] = "  "  # en passant
+                captured = True
+            if end_row in (0, 7):
+                piece = piece[0] + promotion
+        elif piece[1] == "K" and abs(end_col - start_col) == 2:
+            rook_col, rook_to = (7, 5) if end_col > start_col else (0, 3)
+            board[end_row][rook_to] = board[end_row][rook_col]
+            board[end_row][rook_col] = "  "
         board[end_row][end_col] = piece
+
+        if state is not None:
+            keep = CASTLING_MASKS[start_row * 8 + start_col] & CASTLING_MASKS[end_row * 8 + end_col]
+            rights = state.get("castling") or "-"
+            state["castling"] = "".join(letter for right, letter in CASTLING_LETTERS
+                                        if letter in rights and keep & right) or "-"
+            double_push = pawn_move and abs(end_row - start_row) == 2
+            state["ep_square"] = self.index_to_coord((start_row + end_row) // 2, start_col) if double_push else None
+            state["halfmove_clock"] = 0 if pawn_move or captured else state.get("halfmove_clock", 0) + 1
+            if piece[0] == "b":
+                state["fullmove_number"] = state.get("fullmove_number", 1) + 1
+
+    def apply_move(self, board, move, state=None):
+        # Engine moves are (r1, c1, r2, c2) tuples with the promotion piece type as an optional fifth element
+        promotion = PIECE_NAMES[move[4]][1] if len(move) == 5 else "Q"
+        self.move_piece(board, self.index_to_coord(move[0], move[1]), self.index_to_coord(move[2], move[3]),
+                        promotion, state)
+
+    def to_fen(self, board, color, state=None):
+        # The full position for ArrayBoard.from_fen or the engine's "fen" requests
+        state = state or self.initial_state()
+        ranks = []
+        for row in board:
+            rank, empty = "", 0
+            for square in row:
+                if square.strip():
+                    letter = square[1] if square[0] == "w" else square[1].lower()
+                    rank += (str(empty) if empty else "") + letter
+                    empty = 0
+                else:
+                    empty += 1
+            ranks.append(rank + (str(empty) if empty else ""))
+        return (f"{'/'.join(ranks)} {color} {state.get('castling') or '-'} {state.get('ep_square') or '-'} "
+                f"{state.get('halfmove_clock', 0)} {state.get('fullmove_number', 1)}")
@@ -0,0 +1,214 @@
+import itertools
+import multiprocessing
+import os
+import threading
+import zlib
+
+from ai import Search, SEARCH_TECHNIQUES
+from array_board import ArrayBoard
+from evaluation import Evaluation
+from game_io import START_FEN
+
+WARM_UP_DEPTH = 2
+# Per-worker ring of recently cancelled job ids, shared with the worker process
+CANCEL_SLOTS = 64
+
+
+class EngineError(Exception):
+    pass
+
+
+class EngineService:
+    # Long-lived engine state for one process: a single evaluator (with its pawn hash table) shared by one Search
+    # per configuration, each keeping its transposition table between requests. Precomputed move tables are module
+    # level and are filled by the warm-up search.
+
+    def __init__(self, use_bitboards=True, tt_size_mb=16, pawn_hash_mb=2, warm_up=True):
+        self.use_bitboards = use_bitboards
+        self.tt_size_mb = tt_size_mb
+        self.evaluator = Evaluation(pawn_hash_mb=pawn_hash_mb)
+        self.searches = {}
+        self.requests_served = 0
+        if warm_up:
+            self.analyse({"fen": START_FEN, "depth": WARM_UP_DEPTH})
+
+    def search_for(self, personality="machine", **techniques):
+        key = (personality,) + tuple(bool(techniques.get(name)) for name in SEARCH_TECHNIQUES)
+        if key not in self.searches:
+            self.searches[key] = Search(use_bitboards=self.use_bitboards, tt_size_mb=self.tt_size_mb,
+                                        personality=personality, evaluator=self.evaluator,
+                                        **{name: techniques.get(name, False) for name in SEARCH_TECHNIQUES})
+        return self.searches[key]
+
+    def analyse(self, request, on_iteration=None, stop_check=None):
+        # request: board (list of lists or ArrayBoard) and color, or a fen; depth; and optionally time_limit,
+        # soft_time_limit, node_limit, personality and the SEARCH_TECHNIQUES switches. A stopped search still returns
+        # the best move of the last finished iteration.
+        search = self.search_for(request.get("personality", "machine"),
+                                 **{name: request.get(name, False) for name in SEARCH_TECHNIQUES})
+        search.stop_check = stop_check
+        try:
+            if "fen" in request:
+                board = ArrayBoard.from_fen(request["fen"])
+                color = board.side
+            else:
+                color = request["color"]
+                board = ArrayBoard.coerce(request["board"], color)
+            move, score = search.iterative_deepening(board, color, request["depth"], request.get("time_limit"),
+                                                     request.get("soft_time_limit"), request.get("node_limit"),
+                                                     on_iteration)
+        finally:
+            search.stop_check = None
+        self.requests_served += 1
+        return {
+            "move": move,
+            "score": score,
+            "stopped": bool(stop_check and stop_check()),
+            "pv": search.pv,
+            "nodes": search.nodes,
+            "iterations": search.iterations,
+            "tt": search.tt.stats(),
+            "pawn_hash": self.evaluator.pawn_hash_table.stats(),
+        }
+
+
+def _worker_main(task_queue, result_queue, cancelled, service_options):
+    # Messages to the pool are (job_id, kind, payload) with kind "info" (one per finished iteration), "result"
+    # or "error"; a None task stops the worker.
+    service = EngineService(**service_options)
+    result_queue.put((None, "ready", os.getpid()))
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        job_id, request = task
+
+        def on_iteration(info):
+            result_queue.put((job_id, "info", info))
+
+        def stop_check():
+            return job_id in cancelled[:]
+
+        try:
+            result_queue.put((job_id, "result", service.analyse(request, on_iteration, stop_check)))
+        except Exception as exc:
+            result_queue.put((job_id, "error", f"{type(exc).__name__}: {exc}"))
+
+
+class EnginePool:
+    # Worker processes, each owning one EngineService, behind a submit/result API. Jobs of the same game go to the
+    # same worker so consecutive moves hit its warm transposition and pawn tables.
+
+    def __init__(self, workers=None, use_bitboards=True, tt_size_mb=16, pawn_hash_mb=2):
+        context = multiprocessing.get_context()
+        service_options = {"use_bitboards": use_bitboards, "tt_size_mb": tt_size_mb, "pawn_hash_mb": pawn_hash_mb}
+        self.result_queue = context.Queue()
+        self.task_queues = []
+        self.cancelled = []
+        self.processes = []
+        for _ in range(workers or os.cpu_count() or 1):
+            task_queue = context.Queue()
+            cancelled = context.Array('q', CANCEL_SLOTS, lock=False)
+            process = context.Process(target=_worker_main,
+                                      args=(task_queue, self.result_queue, cancelled, service_options), daemon=True)
+            process.start()
+            self.task_queues.append(task_queue)
+            self.cancelled.append(cancelled)
+            self.processes.append(process)
+
+        self.job_ids = itertools.count(1)
+        self.next_worker = itertools.count()
+        self.results = {}
+        self.callbacks = {}
+        self.done_callbacks = {}
+        self.job_workers = {}
+        self.cancel_slots = [0] * len(self.processes)
+        self.ready = 0
+        self.condition = threading.Condition()
+        self.collector = threading.Thread(target=self.collect, daemon=True)
+        self.collector.start()
+
+    def collect(self):
+        # Single reader of the result queue; everyone else waits on the condition
+        while True:
+            job_id, kind, payload = self.result_queue.get()
+            if kind == "stop":
+                break
+            if kind == "info":
+                callback = self.callbacks.get(job_id)
+                if callback is not None:
+                    callback(payload)
+                continue
+            with self.condition:
+                if kind == "ready":
+                    self.ready += 1
+                else:
+                    self.callbacks.pop(job_id, None)
+                    self.job_workers.pop(job_id, None)
+                    on_done = self.done_callbacks.pop(job_id, None)
+                    if on_done is not None:
+                        on_done(kind, payload)
+                    else:
+                        self.results[job_id] = (kind, payload)
+                self.condition.notify_all()
+
+    def worker_for(self, game_id):
+        if game_id is None:
+            return next(self.next_worker) % len(self.task_queues)
+        return zlib.crc32(str(game_id).encode()) % len(self.task_queues)
+
+    def submit(self, request, game_id=None, on_iteration=None, on_done=None):
+        # Callbacks run on the collector thread. With on_done, the outcome goes to on_done(kind, payload) and is
+        # not kept for result().
+        job_id = next(self.job_ids)
+        worker = self.worker_for(game_id)
+        with self.condition:
+            if on_iteration is not None:
+                self.callbacks[job_id] = on_iteration
+            if on_done is not None:
+                self.done_callbacks[job_id] = on_done
+            self.job_workers[job_id] = worker
+        self.task_queues[worker].put((job_id, request))
+        return job_id
+
+    def cancel(self, job_id):
+        # The search stops at its next check and reports the best move so far; returns False for finished jobs
+        with self.condition:
+            worker = self.job_workers.get(job_id)
+            if worker is None:
+                return False
+            slot = self.cancel_slots[worker]
+            self.cancelled[worker][slot] = job_id
+            self.cancel_slots[worker] = (slot + 1) % CANCEL_SLOTS
+        return True
+
+    def result(self, job_id, timeout=None):
+        with self.condition:
+            if not self.condition.wait_for(lambda: job_id in self.results, timeout):
+                raise TimeoutError(f"engine job {job_id} did not finish within {timeout}s")
+            kind, payload = self.results.pop(job_id)
+        if kind == "error":
+            raise EngineError(payload)
+        return payload
+
+    def analyse(self, request, game_id=None, timeout=None):
+        return self.result(self.submit(request, game_id), timeout)
+
+    def wait_ready(self, timeout=None):
+        # Blocks until every worker finished its warm-up
+        with self.condition:
+            return self.condition.wait_for(lambda: self.ready == len(self.processes), timeout)
+
+    def close(self):
+        for task_queue in self.task_queues:
+            task_queue.put(None)
+        for process in self.processes:
+            process.join()
+        self.result_queue.put((None, "stop", None))
+        self.collector.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
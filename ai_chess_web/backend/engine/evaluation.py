@@ -1,29 +1,71 @@
-from move_generator import MoveGenerator
+from array_board import ArrayBoard, PAWN, color_bit
+from attack_map import AttackMap
+from pawn_hash_table import PawnHashTable
+from personality_utils import DEFAULT_WEIGHTS
+from piece_square_tables import PIECE_VALUES, PAWN_TABLE, KNIGHT_TABLE
+
+
+class EvaluationBreakdown:
+    def __init__(self, personality, material, positional, structure, mobility, center, weighted):
+        self.personality = personality
+        self.material = material
+        self.positional = positional
+        self.structure = structure
+        self.mobility = mobility
+        self.center = center
+        self.weighted = weighted  # personality-weighted heuristic terms, keyed by weight name
+        self.total = material + positional + sum(weighted.values())
+
+    def percentages(self, round_to=2):
+        raw = {
+            "material": self.material,
+            "positional": self.positional,
+            "structure": self.structure,
+            "mobility": self.mobility,
+            "center": self.center,
+        }
+        base_total = sum(abs(value) for value in raw.values())
+        return {name: 0 if base_total == 0 else round(abs(value) / base_total * 100, round_to)
+                for name, value in raw.items()}
+
+    def as_dict(self):
+        return {
+            "personality": self.personality,
+            "material": self.material,
+            "positional": self.positional,
+            "structure": self.structure,
+            "mobility": round(self.mobility, 2),
+            "center": self.center,
+            "weighted": {name: round(value, 4) for name, value in self.weighted.items()},
+            "total": round(self.total, 2),
+        }
+
+    def report(self):
+        shares = self.percentages()
+        return "\n".join([
+            f"\n🧠 Evaluation Breakdown [{self.personality.upper()}]:",
+            f"  Material:   {shares['material']}%",
+            f"  Positional: {shares['positional']}%",
+            f"  Structure:  {shares['structure']}%",
+            f"  Mobility:   {shares['mobility']}%",
+            f"  Center Ctrl: {shares['center']}%",
+            f"  Total Evaluation: {round(self.total, 2)}",
+        ])
 
 
 class Evaluation:
-    def __init__(self):
-        self.piece_values = {"P": 1, "N": 3, "B": 3, "R": 5, "Q": 9, "K": 0}
-        self.pawn_table = [
-            [0, 0, 0, 0, 0, 0, 0, 0],
-            [5, 5, 5, -5, -5, 5, 5, 5],
-            [1, 1, 2, 3, 3, 2, 1, 1],
-            [0.5, 0.5, 1, 2.5, 2.5, 1, 0.5, 0.5],
-            [0, 0, 0, 2, 2, 0, 0, 0],
-            [0.5, -0.5, -1, 0, 0, -1, -0.5, 0.5],
-            [0.5, 1, 1, -2, -2, 1, 1, 0.5],
-            [0, 0, 0, 0, 0, 0, 0, 0]
-        ]
-        self.knight_table = [
-            [-5, -4, -3, -3, -3, -3, -4, -5],
-            [-4, -2, 0, 0.5, 0.5, 0, -2, -4],
-            [-3, 0.5, 1, 1.5, 1.5, 1, 0.5, -3],
-            [-3, 0, 1.5, 2, 2, 1.5, 0, -3],
-            [-3, 0.5, 1.5, 2, 2, 1.5, 0.5, -3],
-            [-3, 0, 1, 1.5, 1.5, 1, 0, -3],
-            [-4, -2, 0, 0, 0, 0, -2, -4],
-            [-5, -4, -3, -3, -3, -3, -4, -5]
-        ]
+    def __init__(self, debug=False, pawn_hash_mb=2):
+        self.piece_values = dict(PIECE_VALUES)
+        self.pawn_table = PAWN_TABLE
+        self.knight_table = KNIGHT_TABLE
+        # Mirrored tables for black are built once instead of reversing the table for every black piece
+        self.positional_tables = {
+            "w": {"P": self.pawn_table, "N": self.knight_table},
+            "b": {"P": self.reverse_table(self.pawn_table), "N": self.reverse_table(self.knight_table)},
+        }
+        self.pawn_hash_table = PawnHashTable(pawn_hash_mb)
+        # With debug on, incremental material/positional totals are checked against a full rescan
+        self.debug = debug
 
     def calculate_percentage(self, part, total, round_to=2):
         return 0 if min(part, total) == 0 else round((part / total) * 100, round_to)
@@ -31,30 +73,20 @@ class Evaluation:
     def reverse_table(self, table):
         return table[::-1]
 
-    def mobility_score(self, board, color):
-        return 0.1 * len(MoveGenerator().get_legal_moves(board, color))
+    def mobility_score(self, board, color, attack_map=None):
+        # Pseudo-legal move count taken from the attack map
+        attack_map = attack_map or AttackMap(board)
+        return 0.1 * attack_map.mobility[color]
 
-    def center_control_score(self, board, color, enemy):
+    def center_control_score(self, board, color, enemy, attack_map=None):
         center_squares = [(3, 3), (3, 4), (4, 3), (4, 4)]
         score = 0
+        attack_map = attack_map or AttackMap(board)
 
-        # Create attack maps
-        my_moves = MoveGenerator().get_detailed_moves(board, color)  # [(r1, c1, r2, c2, piece_type), ...]
-        enemy_moves = MoveGenerator().get_detailed_moves(board, enemy)
-
-        for square in center_squares:
-            attackers = {"P": 0, "N": 0, "B": 0, "R": 0, "Q": 0, "K": 0}
-            defenders = {"P": 0, "N": 0, "B": 0, "R": 0, "Q": 0, "K": 0}
-
-            # Count friendly attackers
-            for r1, c1, r2, c2, ptype in my_moves:
-                if (r2, c2) == square:
-                    attackers[ptype] += 1
-
-            # Count enemy attackers (aka defenders)
-            for r1, c1, r2, c2, ptype in enemy_moves:
-                if (r2, c2) == square:
-                    defenders[ptype] += 1
+        for row, col in center_squares:
+            # Friendly attackers vs enemy attackers (aka defenders)
+            attackers = attack_map.attackers(row * 8 + col, color)
+            defenders = attack_map.attackers(row * 8 + col, enemy)
 
             # Piece-weighted influence
             piece_weights = {
@@ -77,15 +109,24 @@ class Evaluation:
 
         return round(score, 2)
 
-    def pawn_structure_score(self, board, color):
-        score = 0
+    def pawn_files(self, board, color):
+        # Rows of color's pawns per file, from a list board or straight from an ArrayBoard's piece sets
         files = {i: [] for i in range(8)}
-        enemy_color = "b" if color == "w" else "w"
-
+        if isinstance(board, ArrayBoard):
+            for sq in sorted(board.pieces[color_bit(color) | PAWN]):
+                files[sq & 7].append(sq >> 3)
+            return files
         for row in range(8):
             for col in range(8):
                 if board[row][col] == color + "P":
                     files[col].append(row)
+        return files
+
+    def pawn_structure_terms(self, board, color):
+        # (doubled, isolated, passed) contributions for color's pawns
+        doubled, isolated, passed = 0, 0, 0
+        files = self.pawn_files(board, color)
+        enemy_files = self.pawn_files(board, "b" if color == "w" else "w")
 
         for col in range(8):
             pawns = files[col]
@@ -93,7 +134,7 @@ class Evaluation:
                 continue
 
             if len(pawns) > 1:
-                score -= 0.5 * (len(pawns) - 1)
+                doubled -= 0.5 * (len(pawns) - 1)
 
             for row in pawns:
                 # Isolated check
@@ -102,23 +143,36 @@ class Evaluation:
                     if 0 <= adj < 8 and files[adj]:
                         is_isolated = False
                 if is_isolated:
-                    score -= 0.3
+                    isolated -= 0.3
 
-                # Passed pawn check
+                # Passed pawn check: no enemy pawn ahead on this or an adjacent file
                 blocked = False
-                for r in range(row - 1, -1, -1) if color == "w" else range(row + 1, 8):
-                    for dc in [col - 1, col, col + 1]:
-                        if 0 <= dc < 8 and board[r][dc] == enemy_color + "P":
-                            blocked = True
+                for dc in [col - 1, col, col + 1]:
+                    if 0 <= dc < 8:
+                        for r in enemy_files[dc]:
+                            if (r < row) if color == "w" else (r > row):
+                                blocked = True
                 if not blocked:
-                    score += 0.5
+                    passed += 0.5
 
-        return score
-
-    def evaluate_board(self, board, color, personality="machine", verbose=False):
-        enemy = "b" if color == "w" else "w"
-        score, positional_bonus, material = 0, 0, 0
+        return doubled, isolated, passed
 
+    def pawn_structure_score(self, board, color):
+        return sum(self.pawn_structure_terms(board, color))
+
+    def cached_pawn_structure_score(self, array_board, color):
+        # The pawn skeleton rarely changes between sibling nodes, so terms for both colours are cached together.
+        # A miss reads the pawns off the ArrayBoard's piece sets; nothing is converted to a list board.
+        entry = self.pawn_hash_table.probe(array_board.pawn_hash)
+        if entry is None:
+            entry = self.pawn_hash_table.store(array_board.pawn_hash,
+                                               self.pawn_structure_terms(array_board, "w"),
+                                               self.pawn_structure_terms(array_board, "b"))
+        return sum(entry[1] if color == "w" else entry[2])
+
+    def material_scores(self, board, color):
+        # Full rescan of piece values and piece-square bonuses, from color's point of view
+        material, positional_bonus = 0, 0
         for row in range(8):
             for col in range(8):
                 square = board[row][col]
@@ -126,46 +180,52 @@ class Evaluation:
                     pc_color = square[0]
                     pc_type = square[1]
                     val = self.piece_values.get(pc_type, 0)
+                    table = self.positional_tables[pc_color].get(pc_type)
+                    bonus = table[row][col] if table else 0
 
-                    # Positional table bonuses
-                    bonus = 0
-                    match pc_type:
-                        case "P":
-                            table = self.pawn_table if pc_color == "w" else self.reverse_table(self.pawn_table)
-                            bonus = table[row][col]
-                        case "N":
-                            table = self.knight_table if pc_color == "w" else self.reverse_table(self.knight_table)
-                            bonus = table[row][col]
-
-                    total_piece_score = val + bonus
                     material += val if pc_color == color else -val
                     positional_bonus += bonus if pc_color == color else -bonus
-                    score += total_piece_score if pc_color == color else -total_piece_score
+        return material, positional_bonus
+
+    def incremental_material_scores(self, board, color):
+        # Running totals kept by ArrayBoard.make_move/unmake_move, stored white-minus-black
+        sign = 1 if color == "w" else -1
+        return sign * board.material, sign * board.positional
+
+    def personality_terms(self, personality, structure, mobility, center, weights=None):
+        w = weights or DEFAULT_WEIGHTS.get(personality, DEFAULT_WEIGHTS["machine"])
+        return {
+            "structure": w["structure"] * structure,
+            "mobility": w["mobility"] * mobility,
+            "center": w["center"] * center,
+            "risk_penalty": w.get("risk_penalty", 0) * abs(structure),
+        }
+
+    def evaluate_breakdown(self, board, color, personality="machine", weights=None):
+        # Every term is computed exactly once; personality weights come from DEFAULT_WEIGHTS unless given
+        enemy = "b" if color == "w" else "w"
 
-            # — Modular Heuristic Weights Based on Personality —
+        if isinstance(board, ArrayBoard):
+            array_board = board
+            material, positional_bonus = self.incremental_material_scores(array_board, color)
+            attack_map = AttackMap(array_board)
+            structure = self.cached_pawn_structure_score(array_board, color)
+            if self.debug:
+                expected = self.material_scores(array_board.to_list(), color)
+                assert (material, positional_bonus) == expected, \
+                    f"incremental {(material, positional_bonus)} != rescan {expected}"
+        else:
+            material, positional_bonus = self.material_scores(board, color)
+            attack_map = AttackMap(board)
             structure = self.pawn_structure_score(board, color)
-            mobility = self.mobility_score(board, color)
-            center = self.center_control_score(board, color, enemy)
-            match personality:
-                case "positionalist":
-                    score += 0.6 * structure + 0.3 * mobility + 0.4 * center
-                case "gambiteer":
-                    score += 0.2 * structure + 0.7 * mobility - 0.1 * abs(structure) + 0.1 * center
-                case "grinder":
-                    score += 0.7 * structure + 0.4 * mobility + 0.3 * center
-                case "romantic":
-                    score += 0.1 * structure + 0.8 * mobility + 0.2 * center
-                case _:
-                    score += 0.4 * structure + 0.5 * mobility + 0.25 * center
-
-            if verbose:
-                base_total = abs(material) + abs(positional_bonus) + abs(structure) + abs(mobility) + abs(center)
-                print(f"\n🧠 Evaluation Breakdown [{personality.upper()}]:")
-                print(f"  Material:   {self.calculate_percentage(abs(material), base_total)}%")
-                print(f"  Positional: {self.calculate_percentage(abs(positional_bonus), base_total)}%")
-                print(f"  Structure:  {self.calculate_percentage(abs(structure), base_total)}%")
-                print(f"  Mobility:   {self.calculate_percentage(abs(mobility), base_total)}%")
-                print(f"  Center Ctrl: {self.calculate_percentage(abs(center), base_total)}%")
-                print(f"  Total Evaluation: {round(score, 2)}")
 
-        return round(score, 2)
+        mobility = self.mobility_score(board, color, attack_map)
+        center = self.center_control_score(board, color, enemy, attack_map)
+        weighted = self.personality_terms(personality, structure, mobility, center, weights)
+        return EvaluationBreakdown(personality, material, positional_bonus, structure, mobility, center, weighted)
+
+    def evaluate_board(self, board, color, personality="machine", verbose=False, weights=None):
+        breakdown = self.evaluate_breakdown(board, color, personality, weights)
+        if verbose:
+            print(breakdown.report())
+        return round(breakdown.total, 2)
@@ -0,0 +1,54 @@
+from evaluation import Evaluation
+
+# (name, piece placement from rank 8 to rank 1 as in FEN, side to evaluate for, personality, pinned score)
+REGRESSION_POSITIONS = [
+    ("start", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR", "w", "machine", 1.0),
+    ("after e4", "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR", "b", "positionalist", -4.52),
+    ("knight out", "rnbqkbnr/pppppppp/8/8/8/7N/PPPPPPPP/RNBQKB1R", "b", "grinder", -0.2),
+    ("open middlegame", "r1bk1b1r/ppn1pppp/2pp1n2/4P3/5P2/3PB2q/PPPNQKPP/R4BNR", "w", "positionalist", 1.75),
+    ("exposed king", "r1k2b1r/7p/p1np4/1ppn2p1/1P1P1p2/P6K/2PN3P/R1B2BNb", "w", "machine", -12.72),
+    ("pawn storm", "rn1q1bbr/8/1p4pp/p1pPPkP1/PP5P/3PN3/3BP3/R2QKBR1", "b", "gambiteer", -9.9),
+    ("rook lift", "2bqk1n1/rp1pp1br/n5pp/p7/P1P2p2/RP3P2/2P1PNPP/1NBQKB1R", "w", "romantic", 8.06),
+    ("bishop raid", "r2qkb1r/p1B2np1/np2b3/P1p2p1p/3Pp3/2P2Q2/1P1NKPPP/R4BNR", "b", "machine", 2.22),
+    ("scattered pawns", "rnb2k2/pr6/4pN2/1p5p/P4p1P/K1NP1pPB/R1P1P3/2BQ2R1", "b", "positionalist", -17.6),
+    ("rook vs knight endgame", "6k1/5pp1/4r3/P7/p7/2N5/3P4/6K1", "w", "grinder", -5.27),
+    ("rook vs knight endgame", "6k1/5pp1/4r3/P7/p7/2N5/3P4/6K1", "b", "gambiteer", 7.72),
+]
+
+
+def board_from_placement(placement):
+    board = []
+    for rank in placement.split("/"):
+        row = []
+        for char in rank:
+            if char.isdigit():
+                row += ["  "] * int(char)
+            else:
+                row.append(("w" if char.isupper() else "b") + char.upper())
+        board.append(row)
+    return board
+
+
+def run_regression(evaluator=None, tolerance=0.005, verbose=True):
+    # Re-scores the pinned corpus; any intended evaluation change must update the expected scores above
+    evaluator = evaluator or Evaluation()
+    failures = []
+    for name, placement, color, personality, expected in REGRESSION_POSITIONS:
+        score = evaluator.evaluate_board(board_from_placement(placement), color, personality)
+        if abs(score - expected) > tolerance:
+            failures.append((name, color, personality, expected, score))
+
+    if verbose:
+        for name, color, personality, expected, score in failures:
+            print(f"❌ {name} [{color}, {personality}]: expected {expected}, got {score}")
+        print(f"✅ {len(REGRESSION_POSITIONS) - len(failures)}/{len(REGRESSION_POSITIONS)} positions match")
+    return failures
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check the evaluation against the pinned regression scores")
+    parser.add_argument("--tolerance", type=float, default=0.005)
+    args = parser.parse_args()
+    raise SystemExit(1 if run_regression(tolerance=args.tolerance) else 0)
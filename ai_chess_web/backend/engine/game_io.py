@@ -0,0 +1,251 @@
+import mmap
+import re
+
+from array_board import ArrayBoard
+from notation import move_to_san, parse_san
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+# Header tags written first, in this order, as the PGN standard's seven tag roster
+TAG_ROSTER = ("Event", "Site", "Date", "Round", "White", "Black", "Result")
+
+HEADER_PATTERN = re.compile(r'\[(\w+)\s+"((?:[^"\\]|\\.)*)"\]')
+# Tag values escape backslashes and quotes; both are undone in a single pass, so a value written as \\\" reads back as \"
+TAG_ESCAPE_PATTERN = re.compile(r'\\(["\\])')
+# Movetext tokens: comments, variation brackets, NAGs, move numbers, results and moves
+MOVETEXT_PATTERN = re.compile(r"\{[^}]*\}|;[^\n]*|\(|\)|\$\d+|\d+\.+|1-0|0-1|1/2-1/2|\*|[^\s(){};]+")
+
+
+def read_lines(path, use_mmap=False):
+    # Lazily yields decoded lines without their line ending. With use_mmap the file is paged in by the OS instead
+    # of being copied through Python's read buffers, which helps on multi-GB archives read once front to back.
+    with open(path, "rb") as handle:
+        if use_mmap:
+            try:
+                mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return  # empty files cannot be mapped
+            with mapped:
+                for line in iter(mapped.readline, b""):
+                    yield line.decode("utf-8", errors="replace").rstrip("\r\n")
+        else:
+            for line in handle:
+                yield line.decode("utf-8", errors="replace").rstrip("\r\n")
+
+
+def _records(path, use_mmap):
+    for line in read_lines(path, use_mmap):
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line
+
+
+def read_fen(path, use_mmap=False):
+    # One position per line; blank lines and # comments are skipped
+    for line in _records(path, use_mmap):
+        yield ArrayBoard.from_fen(line)
+
+
+def parse_epd_operations(text):
+    # 'bm Nf3; id "pos 1";' -> {"bm": ["Nf3"], "id": ["pos 1"]}
+    operations = {}
+    for operation in re.findall(r'(?:[^;"]|"[^"]*")+', text):
+        parts = re.findall(r'"[^"]*"|\S+', operation)
+        if parts:
+            operations[parts[0]] = [part.strip('"') for part in parts[1:]]
+    return operations
+
+
+def parse_epd(line):
+    # EPD is the first four FEN fields followed by operations; hmvc/fmvn fill in the move counters
+    fields = line.split(None, 4)
+    operations = parse_epd_operations(fields[4]) if len(fields) > 4 else {}
+    clocks = [operations.get("hmvc", ["0"])[0], operations.get("fmvn", ["1"])[0]]
+    return ArrayBoard.from_fen(" ".join(fields[:4] + clocks)), operations
+
+
+def read_epd(path, use_mmap=False):
+    # Yields (board, operations) per line
+    for line in _records(path, use_mmap):
+        yield parse_epd(line)
+
+
+def format_epd(board, operations=None):
+    fields = board.to_fen().split()[:4]
+    text = " ".join(fields)
+    for opcode, operands in (operations or {}).items():
+        formatted = [f'"{operand}"' if " " in str(operand) or opcode == "id" else str(operand)
+                     for operand in operands]
+        text += " " + " ".join([opcode] + formatted) + ";"
+    return text
+
+
+def write_fen(path, boards):
+    count = 0
+    with open(path, "w", encoding="utf-8") as handle:
+        for board in boards:
+            handle.write(board.to_fen() + "\n")
+            count += 1
+    return count
+
+
+def write_epd(path, records):
+    # records: (board, operations) pairs, as read_epd yields them
+    count = 0
+    with open(path, "w", encoding="utf-8") as handle:
+        for board, operations in records:
+            handle.write(format_epd(board, operations) + "\n")
+            count += 1
+    return count
+
+
+class PgnGame:
+    # Headers plus the main line in SAN; comments and variations are dropped when reading
+
+    def __init__(self, headers=None, moves=None, result="*"):
+        self.headers = dict(headers or {})
+        self.moves = list(moves or [])
+        self.result = self.headers.get("Result", result) if result == "*" else result
+
+    def start_board(self):
+        return ArrayBoard.from_fen(self.headers.get("FEN", START_FEN))
+
+    def replay(self, generator=None):
+        # Yields (board before the move, move) along the main line; the board is updated in place
+        board = self.start_board()
+        for san in self.moves:
+            move = parse_san(board, san, generator)
+            yield board, move
+            board.make_move(move)
+
+    def final_board(self, generator=None):
+        board = self.start_board()
+        for san in self.moves:
+            board.make_move(parse_san(board, san, generator))
+        return board
+
+    @classmethod
+    def from_moves(cls, moves, headers=None, result="*", start_fen=None, generator=None):
+        # Builds SAN from engine move tuples played from start_fen (or the standard start)
+        board = ArrayBoard.from_fen(start_fen or START_FEN)
+        san_moves = []
+        for move in moves:
+            san_moves.append(move_to_san(board, move, generator))
+            board.make_move(move)
+        headers = dict(headers or {})
+        if start_fen and start_fen != START_FEN:
+            headers.update({"SetUp": "1", "FEN": start_fen})
+        headers["Result"] = result
+        return cls(headers, san_moves, result)
+
+    def to_pgn(self, line_width=80):
+        headers = dict(self.headers, Result=self.result)
+        names = list(TAG_ROSTER) + [tag for tag in headers if tag not in TAG_ROSTER]
+        lines = []
+        for tag in names:
+            value = str(headers.get(tag, "?")).replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'[{tag} "{value}"]')
+        lines.append("")
+
+        board = self.start_board()
+        number, black_first = board.fullmove_number, board.side == "b"
+        tokens = []
+        for index, san in enumerate(self.moves):
+            white_to_move = (index % 2 == 0) != black_first
+            if white_to_move:
+                tokens.append(f"{number}.")
+            elif index == 0:
+                tokens.append(f"{number}...")
+            tokens.append(san)
+            if not white_to_move:
+                number += 1
+        tokens.append(self.result)
+
+        line = ""
+        for token in tokens:
+            if line and len(line) + 1 + len(token) > line_width:
+                lines.append(line)
+                line = token
+            else:
+                line = f"{line} {token}" if line else token
+        lines.append(line)
+        return "\n".join(lines) + "\n"
+
+
+def parse_movetext(text):
+    # Main-line SAN moves and the result token; comments, NAGs and (nested) variations are skipped
+    moves, result, depth = [], "*", 0
+    for token in MOVETEXT_PATTERN.findall(text):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth = max(0, depth - 1)
+        elif depth or token[0] in "{;$" or (token[0].isdigit() and token.endswith(".")):
+            continue
+        elif token in RESULTS:
+            result = token
+        else:
+            moves.append(token)
+    return moves, result
+
+
+def read_pgn(path, use_mmap=False):
+    # Lazily yields one PgnGame at a time; only the current game's text is held in memory
+    headers, movetext, open_comments = {}, [], 0
+    for line in read_lines(path, use_mmap):
+        stripped = line.strip()
+        if stripped.startswith("[") and not open_comments:
+            if movetext:
+                yield PgnGame(headers, *parse_movetext("\n".join(movetext)))
+                headers, movetext = {}, []
+            match = HEADER_PATTERN.match(stripped)
+            if match:
+                headers[match.group(1)] = TAG_ESCAPE_PATTERN.sub(r"\1", match.group(2))
+        elif stripped and not stripped.startswith("%"):
+            movetext.append(line)
+            open_comments = max(0, open_comments + line.count("{") - line.count("}"))
+    if headers or movetext:
+        yield PgnGame(headers, *parse_movetext("\n".join(movetext)))
+
+
+def write_pgn(path, games, mode="w"):
+    # games: PgnGame objects; mode="a" appends to an existing archive
+    count = 0
+    with open(path, mode, encoding="utf-8") as handle:
+        for game in games:
+            handle.write(game.to_pgn() + "\n")
+            count += 1
+    return count
+
+
+def run_round_trip_check(path):
+    # Writes games with awkward tag values and movetext to `path` and reads them back; returns the mismatches
+    games = [
+        PgnGame.from_moves([(6, 4, 4, 4), (1, 4, 3, 4), (7, 6, 5, 5)],
+                           {"Event": 'Quoted "open" at C:\\chess\\', "Site": '\\"\\\\', "Annotator": "\\"}),
+        PgnGame.from_moves([(1, 3, 3, 3)], {"Event": "Black to move"}, "1-0",
+                           start_fen="rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1"),
+    ]
+    write_pgn(path, games)
+    failures = []
+    for written, read in zip(games, read_pgn(path)):
+        # Tags missing from the seven tag roster are written as "?", so only the written tags are compared
+        if any(read.headers.get(tag) != value for tag, value in written.headers.items()) \
+                or read.moves != written.moves or read.result != written.result:
+            failures.append((written.headers, read.headers))
+    return failures
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Check that games survive a PGN write and read")
+    parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        failures = run_round_trip_check(os.path.join(directory, "round_trip.pgn"))
+    for written, read in failures:
+        print(f"❌ wrote {written}, read {read}")
+    print(f"{'❌' if failures else '✅'} PGN round trip: {len(failures)} mismatches")
+    raise SystemExit(1 if failures else 0)
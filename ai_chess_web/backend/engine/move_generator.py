@@ -1,95 +1,176 @@
-from copy import deepcopy
+from array_board import (ArrayBoard, EMPTY, BLACK, TYPE_MASK, PIECE_NAMES, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+                         CASTLING_ROOKS, PROMOTION_PIECES, WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE, color_bit)
+from utils import on_board
 
-from utils import on_board, is_empty, is_enemy
+ROOK_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+BISHOP_DIRECTIONS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+
+def _step_squares(offsets):
+    return [[(r + dr) * 8 + c + dc for dr, dc in offsets if on_board(r + dr, c + dc)]
+            for r, c in (divmod(sq, 8) for sq in range(64))]
+
+
+def _ray_squares(directions):
+    rays = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        sq_rays = []
+        for dr, dc in directions:
+            ray = []
+            r, c = row + dr, col + dc
+            while on_board(r, c):
+                ray.append(r * 8 + c)
+                r += dr
+                c += dc
+            sq_rays.append(ray)
+        rays.append(sq_rays)
+    return rays
+
+
+KNIGHT_SQUARES = _step_squares([(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)])
+KING_SQUARES = _step_squares(ROOK_DIRECTIONS + BISHOP_DIRECTIONS)
+# Squares a pawn of the given colour attacks from a square (white pawns attack upwards), and the inverse:
+# squares a pawn of the given colour must stand on to attack a square
+PAWN_ATTACK_SQUARES = {"w": _step_squares([(-1, -1), (-1, 1)]), "b": _step_squares([(1, -1), (1, 1)])}
+PAWN_ATTACKER_SQUARES = {"w": PAWN_ATTACK_SQUARES["b"], "b": PAWN_ATTACK_SQUARES["w"]}
+ROOK_RAYS = _ray_squares(ROOK_DIRECTIONS)
+BISHOP_RAYS = _ray_squares(BISHOP_DIRECTIONS)
+# Per colour: (right, king square, squares that must be empty, square the king crosses, king move)
+CASTLING_PATHS = {
+    "w": [(WHITE_KINGSIDE, 60, (61, 62), 61, (7, 4, 7, 6)), (WHITE_QUEENSIDE, 60, (59, 58, 57), 59, (7, 4, 7, 2))],
+    "b": [(BLACK_KINGSIDE, 4, (5, 6), 5, (0, 4, 0, 6)), (BLACK_QUEENSIDE, 4, (3, 2, 1), 3, (0, 4, 0, 2))],
+}
+
+
+def is_noisy(board, move):
+    # Captures (en passant included) and promotions: the moves quiescence search keeps
+    to_sq = move[2] * 8 + move[3]
+    return bool(board.squares[to_sq] or len(move) == 5
+                or (to_sq == board.ep_square and board.squares[move[0] * 8 + move[1]] & TYPE_MASK == PAWN))
 
 
 class MoveGenerator:
     def get_all_moves(self, board, color):
+        board = ArrayBoard.coerce(board)
+        own = color_bit(color)
         moves = []
-        for row in range(8):
-            for col in range(8):
-                piece = board[row][col]
-                if piece.startswith(color):
-                    piece_type = piece[1]
-                    pos = (row, col)
-                    match piece_type:
-                        case "P":
-                            moves += self.get_pawn_moves(board, pos, color)
-                        case "R":
-                            moves += self.get_rook_moves(board, pos, color)
-                        case "Q":
-                            moves += self.get_queen_moves(board, pos, color)
-                        case "K":
-                            moves += self.get_king_moves(board, pos, color)
-                        case "B":
-                            moves += self.get_bishop_moves(board, pos, color)
-                        case "N":
-                            moves += self.get_knight_moves(board, pos, color)
-        return moves
+        for sq, code in enumerate(board.squares):
+            if code and code & BLACK == own:
+                piece_type = PIECE_NAMES[code][1]
+                pos = divmod(sq, 8)
+                match piece_type:
+                    case "P":
+                        moves += self.get_pawn_moves(board, pos, color)
+                    case "R":
+                        moves += self.get_rook_moves(board, pos, color)
+                    case "Q":
+                        moves += self.get_queen_moves(board, pos, color)
+                    case "K":
+                        moves += self.get_king_moves(board, pos, color)
+                    case "B":
+                        moves += self.get_bishop_moves(board, pos, color)
+                    case "N":
+                        moves += self.get_knight_moves(board, pos, color)
+        return moves + self.get_castling_moves(board, color)
 
     def get_pawn_moves(self, board, pos, color):
+        board = ArrayBoard.coerce(board)
+        squares = board.squares
         row, col = pos
         direction = -1 if color == "w" else 1
         start_row = 6 if color == "w" else 1
-        moves = []
+        promotion_row = 0 if color == "w" else 7
+        own = color_bit(color)
+        targets = []
 
         # Forward move
-        if on_board(row + direction, col) and is_empty(board, row + direction, col):
-            moves.append((row, col, row + direction, col))
+        if on_board(row + direction, col) and squares[(row + direction) * 8 + col] == EMPTY:
+            targets.append((row + direction, col))
 
             # Double move from starting row
-            if row == start_row and is_empty(board, row + 2 * direction, col):
-                moves.append((row, col, row + 2 * direction, col))
+            if row == start_row and squares[(row + 2 * direction) * 8 + col] == EMPTY:
+                targets.append((row + 2 * direction, col))
 
-        # Captures
+        # Captures, including en passant onto the square the enemy pawn skipped
         for dc in [-1, 1]:
             r, c = row + direction, col + dc
-            if on_board(r, c) and is_enemy(board, r, c, color):
+            if on_board(r, c):
+                target = squares[r * 8 + c]
+                if (target and target & BLACK != own) or r * 8 + c == board.ep_square:
+                    targets.append((r, c))
+
+        moves = []
+        for r, c in targets:
+            if r == promotion_row:
+                moves += [(row, col, r, c, piece) for piece in PROMOTION_PIECES]
+            else:
                 moves.append((row, col, r, c))
+        return moves
 
+    def get_castling_moves(self, board, color):
+        # Rights, king and rook on their home squares, empty squares between them, and a king that is not in check
+        # and does not cross an attacked square; the destination square is left to the legality filter like any
+        # other king move
+        board = ArrayBoard.coerce(board)
+        squares = board.squares
+        own = color_bit(color)
+        enemy_color = "b" if color == "w" else "w"
+        moves = []
+        for right, king_sq, between, crossed, move in CASTLING_PATHS[color]:
+            if not board.castling & right or squares[king_sq] != own | KING:
+                continue
+            if squares[CASTLING_ROOKS[move[2] * 8 + move[3]][0]] != own | ROOK:
+                continue
+            if any(squares[sq] for sq in between):
+                continue
+            if self.is_square_attacked(board, king_sq, enemy_color) \
+                    or self.is_square_attacked(board, crossed, enemy_color):
+                continue
+            moves.append(move)
         return moves
 
     def get_knight_moves(self, board, pos, color):
-        row, col = pos
-        directions = [
+        return self.get_step_moves(board, pos, color, [
             (-2, -1), (-2, 1), (-1, -2), (-1, 2),
             (1, -2), (1, 2), (2, -1), (2, 1)
-        ]
-        moves = []
-
-        for dr, dc in directions:
-            r, c = row + dr, col + dc
-            if on_board(r, c) and (is_empty(board, r, c) or is_enemy(board, r, c, color)):
-                moves.append((row, col, r, c))
-
-        return moves
+        ])
 
     def get_king_moves(self, board, pos, color):
-        row, col = pos
-        directions = [
+        return self.get_step_moves(board, pos, color, [
             (-1, -1), (-1, 0), (-1, 1),
             (0, -1), (0, 1),
             (1, -1), (1, 0), (1, 1)
-        ]
+        ])
+
+    def get_step_moves(self, board, pos, color, directions):
+        squares = ArrayBoard.coerce(board).squares
+        row, col = pos
+        own = color_bit(color)
         moves = []
 
         for dr, dc in directions:
             r, c = row + dr, col + dc
-            if on_board(r, c) and (is_empty(board, r, c) or is_enemy(board, r, c, color)):
-                moves.append((row, col, r, c))
+            if on_board(r, c):
+                target = squares[r * 8 + c]
+                if target == EMPTY or target & BLACK != own:
+                    moves.append((row, col, r, c))
 
         return moves
 
     def get_sliding_moves(self, board, pos, color, directions):
+        squares = ArrayBoard.coerce(board).squares
         row, col = pos
+        own = color_bit(color)
         moves = []
 
         for dr, dc in directions:
             r, c = row + dr, col + dc
             while on_board(r, c):
-                if is_empty(board, r, c):
+                target = squares[r * 8 + c]
+                if target == EMPTY:
                     moves.append((row, col, r, c))
-                elif is_enemy(board, r, c, color):
+                elif target & BLACK != own:
                     moves.append((row, col, r, c))
                     break
                 else:
@@ -99,56 +180,145 @@ class MoveGenerator:
 
         return moves
 
-    def is_in_check(self, board, color):
-        enemy_color = "b" if color == "w" else "w"
+    def is_square_attacked(self, board, sq, by_color):
+        squares = ArrayBoard.coerce(board).squares
+        enemy = color_bit(by_color)
 
-        # Find king position
-        king_pos = None
-        for row in range(8):
-            for col in range(8):
-                if board[row][col] == color + "K":
-                    king_pos = (row, col)
-                    break
-
-        # Scan enemy moves to see if they attack king
-        enemy_moves = self.get_all_moves(board, enemy_color)
-        for move in enemy_moves:
-            _, _, r, c = move
-            if (r, c) == king_pos:
+        knight = enemy | KNIGHT
+        for attacker_sq in KNIGHT_SQUARES[sq]:
+            if squares[attacker_sq] == knight:
+                return True
+        pawn = enemy | PAWN
+        for attacker_sq in PAWN_ATTACKER_SQUARES[by_color][sq]:
+            if squares[attacker_sq] == pawn:
+                return True
+        king = enemy | KING
+        for attacker_sq in KING_SQUARES[sq]:
+            if squares[attacker_sq] == king:
                 return True
+
+        queen = enemy | QUEEN
+        for sliders, rays in ((enemy | ROOK, ROOK_RAYS[sq]), (enemy | BISHOP, BISHOP_RAYS[sq])):
+            for ray in rays:
+                for attacker_sq in ray:
+                    piece = squares[attacker_sq]
+                    if piece:
+                        if piece == sliders or piece == queen:
+                            return True
+                        break
         return False
 
-    def get_legal_moves(self, board, color):
+    def get_attackers(self, board, sq, by_color):
+        squares = ArrayBoard.coerce(board).squares
+        enemy = color_bit(by_color)
+        attackers = []
+
+        for piece, candidates in ((enemy | KNIGHT, KNIGHT_SQUARES[sq]),
+                                  (enemy | PAWN, PAWN_ATTACKER_SQUARES[by_color][sq]),
+                                  (enemy | KING, KING_SQUARES[sq])):
+            attackers += [attacker_sq for attacker_sq in candidates if squares[attacker_sq] == piece]
+
+        queen = enemy | QUEEN
+        for sliders, rays in ((enemy | ROOK, ROOK_RAYS[sq]), (enemy | BISHOP, BISHOP_RAYS[sq])):
+            for ray in rays:
+                for attacker_sq in ray:
+                    piece = squares[attacker_sq]
+                    if piece:
+                        if piece == sliders or piece == queen:
+                            attackers.append(attacker_sq)
+                        break
+        return attackers
+
+    def get_pinned_squares(self, board, color):
+        # Own pieces standing alone between our king and an enemy rook, bishop or queen on the same line
+        board = ArrayBoard.coerce(board)
+        squares = board.squares
+        king_sq = board.king_square(color)
+        pinned = set()
+        if king_sq is None:
+            return pinned
+
+        own = color_bit(color)
+        enemy = own ^ BLACK
+        queen = enemy | QUEEN
+        for sliders, rays in ((enemy | ROOK, ROOK_RAYS[king_sq]), (enemy | BISHOP, BISHOP_RAYS[king_sq])):
+            for ray in rays:
+                blocker = None
+                for sq in ray:
+                    piece = squares[sq]
+                    if not piece:
+                        continue
+                    if blocker is None and piece & BLACK == own:
+                        blocker = sq
+                        continue
+                    if blocker is not None and (piece == sliders or piece == queen):
+                        pinned.add(blocker)
+                    break
+        return pinned
+
+    def is_in_check(self, board, color):
+        board = ArrayBoard.coerce(board)
+        king_sq = board.king_square(color)
+        if king_sq is None:
+            return False
+        return self.is_square_attacked(board, king_sq, "b" if color == "w" else "w")
+
+    def get_legal_moves(self, board, color, captures_only=False):
+        board = ArrayBoard.coerce(board)
+        squares = board.squares
+        ep_square = board.ep_square
         candidate_moves = self.get_all_moves(board, color)
+        if captures_only:
+            candidate_moves = [move for move in candidate_moves if is_noisy(board, move)]
+        king_sq = board.king_square(color)
+        if king_sq is None:
+            return candidate_moves
+
+        # Checkers and pins are found once; only king moves, pinned pieces and check evasions
+        # need a make/unmake test, everything else is legal as generated.
+        enemy_color = "b" if color == "w" else "w"
+        checkers = self.get_attackers(board, king_sq, enemy_color)
+        pinned = self.get_pinned_squares(board, color)
         legal_moves = []
 
+        double_check = len(checkers) > 1
         for move in candidate_moves:
-            r1, c1, r2, c2 = move
-            new_board = deepcopy(board)
-
-            # Make the move
-            new_board[r2][c2] = new_board[r1][c1]
-            new_board[r1][c1] = "  "
-
-            # Check legality
-            if not self.is_in_check(new_board, color):
+            from_sq = move[0] * 8 + move[1]
+            if from_sq == king_sq:
+                captured = board.make_move(move)
+                if not self.is_square_attacked(board, move[2] * 8 + move[3], enemy_color):
+                    legal_moves.append(move)
+                board.unmake_move(move, captured)
+            elif double_check:
+                continue  # only the king can move
+            elif checkers or from_sq in pinned or (ep_square is not None and move[2] * 8 + move[3] == ep_square
+                                                   and squares[from_sq] & TYPE_MASK == PAWN):
+                # en passant empties two squares of one rank, which the pin scan cannot see
+                captured = board.make_move(move)
+                if not self.is_square_attacked(board, king_sq, enemy_color):
+                    legal_moves.append(move)
+                board.unmake_move(move, captured)
+            else:
                 legal_moves.append(move)
 
         return legal_moves
 
     def get_detailed_moves(self, board, color):
+        board = ArrayBoard.coerce(board)
         basic_moves = self.get_legal_moves(board, color)
+        squares = board.squares
         detailed = []
 
-        for r1, c1, r2, c2 in basic_moves:
-            from_piece = board[r1][c1].strip()
-            to_piece = board[r2][c2].strip()
+        for move in basic_moves:
+            r1, c1, r2, c2 = move[:4]
+            from_piece = squares[r1 * 8 + c1]
+            to_piece = squares[r2 * 8 + c2]
 
             if not from_piece:
                 continue  # defensive coding, just in case
 
-            piece_type = from_piece[1]
-            is_capture = bool(to_piece and to_piece[0] != color)
+            piece_type = board.piece_at(r1, c1)[1]
+            is_capture = bool(to_piece and to_piece & BLACK != color_bit(color))
 
             # Promotion detection
             is_promotion = (
@@ -157,10 +327,9 @@ class MoveGenerator:
             )
 
             # Check detection
-            new_board = deepcopy(board)
-            new_board[r2][c2] = new_board[r1][c1]
-            new_board[r1][c1] = "  "
-            gives_check = self.is_in_check(new_board, "b" if color == "w" else "w")
+            captured = board.make_move(move)
+            gives_check = self.is_in_check(board, "b" if color == "w" else "w")
+            board.unmake_move(move, captured)
 
             detailed.append(
                 (r1, c1, r2, c2, piece_type, is_capture, is_promotion, gives_check)
@@ -169,14 +338,10 @@ class MoveGenerator:
         return detailed
 
     def get_rook_moves(self, board, pos, color):
-        return self.get_sliding_moves(board, pos, color, [(-1, 0), (1, 0), (0, -1), (0, 1)])
+        return self.get_sliding_moves(board, pos, color, ROOK_DIRECTIONS)
 
     def get_bishop_moves(self, board, pos, color):
-        return self.get_sliding_moves(board, pos, color, [(-1, -1), (-1, 1), (1, -1), (1, 1)])
+        return self.get_sliding_moves(board, pos, color, BISHOP_DIRECTIONS)
 
     def get_queen_moves(self, board, pos, color):
-        return self.get_sliding_moves(board, pos, color,
-                                      [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)])
-    
-
-    
+        return self.get_sliding_moves(board, pos, color, ROOK_DIRECTIONS + BISHOP_DIRECTIONS)
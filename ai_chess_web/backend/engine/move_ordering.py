@@ -0,0 +1,95 @@
+from array_board import TYPE_MASK
+
+# Indexed by piece type (PAWN..KING); the king only ever shows up as an attacker or a pseudo-legal victim
+MVV_LVA_VALUES = [0, 1, 3, 3, 5, 9, 20]
+
+PV_SCORE = 4_000_000
+HASH_SCORE = 3_000_000
+CAPTURE_SCORE = 2_000_000
+KILLER_SCORES = (1_000_000, 900_000)
+HISTORY_LIMIT = 500_000
+
+
+class MoveOrderer:
+    # Orders moves as: PV move, hash move, captures by MVV-LVA, killer moves of the ply, quiet moves by history.
+
+    def __init__(self, max_ply=64):
+        self.max_ply = max_ply
+        self.clear()
+
+    def clear(self):
+        self.killers = [[None, None] for _ in range(self.max_ply)]
+        self.history = [0] * 4096  # from_sq * 64 + to_sq
+        self.depth_stats = {}
+
+    def order(self, board, moves, ply, hash_move=None, pv_move=None):
+        squares = board.squares
+        killers = self.killers[ply] if ply < self.max_ply else (None, None)
+        history = self.history
+        scored = []
+
+        for move in moves:
+            from_sq = move[0] * 8 + move[1]
+            to_sq = move[2] * 8 + move[3]
+            victim = squares[to_sq]
+            if move == pv_move:
+                score = PV_SCORE
+            elif move == hash_move:
+                score = HASH_SCORE
+            elif victim or len(move) == 5:
+                # promotions rank with captures, the promoted piece counting as part of the gain
+                gain = MVV_LVA_VALUES[victim & TYPE_MASK] + (MVV_LVA_VALUES[move[4]] if len(move) == 5 else 0)
+                score = CAPTURE_SCORE + 10 * gain - MVV_LVA_VALUES[squares[from_sq] & TYPE_MASK]
+            elif move == killers[0]:
+                score = KILLER_SCORES[0]
+            elif move == killers[1]:
+                score = KILLER_SCORES[1]
+            else:
+                score = history[from_sq * 64 + to_sq]
+            scored.append((score, move))
+
+        # sort is stable, so equal scores keep generator order
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in scored]
+
+    def record_cutoff(self, board, move, ply, depth):
+        # Called with the move unmade: only quiet non-promotion moves feed the killer and history tables
+        from_sq = move[0] * 8 + move[1]
+        to_sq = move[2] * 8 + move[3]
+        if board.squares[to_sq] or len(move) == 5:
+            return
+
+        if ply < self.max_ply:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+
+        index = from_sq * 64 + to_sq
+        self.history[index] += depth * depth
+        if self.history[index] > HISTORY_LIMIT:
+            self.history = [value // 2 for value in self.history]
+
+    def record_node(self, depth, moves_searched, cutoff_index=None):
+        stats = self.depth_stats.setdefault(depth, {"nodes": 0, "moves": 0, "cutoffs": 0, "first_move_cutoffs": 0})
+        stats["nodes"] += 1
+        stats["moves"] += moves_searched
+        if cutoff_index is not None:
+            stats["cutoffs"] += 1
+            if cutoff_index == 0:
+                stats["first_move_cutoffs"] += 1
+
+    def branching_stats(self):
+        # Per remaining depth: interior nodes, average moves searched per node (the effective branching
+        # factor alpha-beta achieved) and how often the first move already produced the cutoff
+        report = {}
+        for depth in sorted(self.depth_stats, reverse=True):
+            stats = self.depth_stats[depth]
+            report[depth] = {
+                "nodes": stats["nodes"],
+                "branching_factor": round(stats["moves"] / stats["nodes"], 2),
+                "cutoff_rate": round(stats["cutoffs"] / stats["nodes"], 3),
+                "first_move_cutoff_rate": round(stats["first_move_cutoffs"] / stats["cutoffs"], 3)
+                if stats["cutoffs"] else 0,
+            }
+        return report
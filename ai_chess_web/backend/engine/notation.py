@@ -0,0 +1,82 @@
+from array_board import TYPE_MASK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, square_name, parse_square
+from bitboard_generator import BitboardMoveGenerator
+
+PIECE_LETTERS = {KNIGHT: "N", BISHOP: "B", ROOK: "R", QUEEN: "Q", KING: "K"}
+PROMOTION_LETTERS = {KNIGHT: "n", BISHOP: "b", ROOK: "r", QUEEN: "q"}
+UCI_PROMOTIONS = {letter: piece for piece, letter in PROMOTION_LETTERS.items()}
+# Check/mate marks and annotation glyphs that may trail a SAN move
+SAN_SUFFIXES = "+#!?"
+
+_generator = BitboardMoveGenerator()
+
+
+def move_to_uci(move):
+    uci = square_name(move[0] * 8 + move[1]) + square_name(move[2] * 8 + move[3])
+    return uci + PROMOTION_LETTERS[move[4]] if len(move) == 5 else uci
+
+
+def parse_uci(text):
+    from_sq, to_sq = parse_square(text[:2]), parse_square(text[2:4])
+    move = (from_sq >> 3, from_sq & 7, to_sq >> 3, to_sq & 7)
+    if len(text) > 4:
+        move += (UCI_PROMOTIONS[text[4].lower()],)
+    return move
+
+
+def san_body(board, move, legal_moves):
+    # SAN without the check suffix, disambiguated against the other legal moves
+    from_sq = move[0] * 8 + move[1]
+    to_sq = move[2] * 8 + move[3]
+    piece_type = board.squares[from_sq] & TYPE_MASK
+    if piece_type == KING and to_sq - from_sq in (2, -2):
+        return "O-O" if to_sq > from_sq else "O-O-O"
+
+    capture = bool(board.squares[to_sq]) or (piece_type == PAWN and move[1] != move[3])
+    if piece_type == PAWN:
+        san = (square_name(from_sq)[0] + "x" if capture else "") + square_name(to_sq)
+        return san + "=" + PIECE_LETTERS[move[4]] if len(move) == 5 else san
+
+    rivals = [other for other in legal_moves
+              if other[2:4] == move[2:4] and other[:2] != move[:2]
+              and board.squares[other[0] * 8 + other[1]] & TYPE_MASK == piece_type]
+    disambiguation = ""
+    if rivals:
+        if all(other[1] != move[1] for other in rivals):
+            disambiguation = square_name(from_sq)[0]
+        elif all(other[0] != move[0] for other in rivals):
+            disambiguation = square_name(from_sq)[1]
+        else:
+            disambiguation = square_name(from_sq)
+    return PIECE_LETTERS[piece_type] + disambiguation + ("x" if capture else "") + square_name(to_sq)
+
+
+def move_to_san(board, move, generator=None, legal_moves=None):
+    generator = generator or _generator
+    color = board.side
+    legal_moves = legal_moves if legal_moves is not None else generator.get_legal_moves(board, color)
+    san = san_body(board, move, legal_moves)
+
+    enemy = "b" if color == "w" else "w"
+    captured = board.make_move(move)
+    if generator.is_in_check(board, enemy):
+        san += "#" if not generator.get_legal_moves(board, enemy) else "+"
+    board.unmake_move(move, captured)
+    return san
+
+
+def parse_san(board, san, generator=None, legal_moves=None):
+    # Matches against the SAN of every legal move with the same destination; raises ValueError if none fits
+    generator = generator or _generator
+    legal_moves = legal_moves if legal_moves is not None else generator.get_legal_moves(board, board.side)
+    text = san.rstrip(SAN_SUFFIXES).replace("0", "O")
+    if len(text) > 2 and text[-1] in "QRBN" and text[-2] in "18":
+        text = text[:-1] + "=" + text[-1]  # promotion written without "="
+    if text.startswith("O-O"):
+        candidates = legal_moves
+    else:
+        destination = text.split("=")[0][-2:]
+        candidates = [move for move in legal_moves if square_name(move[2] * 8 + move[3]) == destination]
+    for move in candidates:
+        if san_body(board, move, legal_moves) == text:
+            return move
+    raise ValueError(f"illegal or ambiguous move {san!r} in {board.to_fen()}")
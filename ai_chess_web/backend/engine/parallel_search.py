@@ -0,0 +1,201 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from ai import Search, SearchAborted
+from array_board import ArrayBoard
+from transposition_table import EXACT
+from zobrist import position_key
+
+# Per-process state of pool workers, set up by _init_worker
+_shared_alpha = None
+_stop_flag = None
+_worker_searches = {}
+_worker_search_ids = {}
+
+
+def _init_worker(shared_alpha, stop_flag):
+    global _shared_alpha, _stop_flag
+    _shared_alpha = shared_alpha
+    _stop_flag = stop_flag
+
+
+def _worker_search(options, search_id):
+    # One Search per option set and worker process. Its transposition table stays warm across every root move the
+    # worker handles and across searches; killers and history are reset only when a new search starts.
+    key = tuple(sorted(options.items()))
+    if key not in _worker_searches:
+        _worker_searches[key] = Search(**options)
+    search = _worker_searches[key]
+    if _worker_search_ids.get(key) != search_id:
+        _worker_search_ids[key] = search_id
+        search.begin_search()
+    return search
+
+
+def _search_root_move(board, color, depth, index, move, alpha, options, deadline, search_id):
+    # Runs in a pool worker. `deadline` is wall-clock time shared by every root move of the search, so a move that
+    # waited in the queue gets only what is left of the budget; the parent raises the stop flag once it gives up.
+    search = _worker_search(options, search_id)
+    nodes, qnodes = search.nodes, search.qnodes
+    search.hard_deadline = time.perf_counter() + (deadline - time.time()) if deadline is not None else None
+    search.stop_check = lambda: _stop_flag.value
+    search.root_depth = depth
+    search.following_pv = False
+    alpha = max(alpha, _shared_alpha.value)
+    in_check = search.generator.is_in_check(board, color)
+    try:
+        score = search.search_move(board, move, index, depth, alpha, float('inf'), color, 0, in_check)
+    except SearchAborted:
+        score = None
+    if score is not None and score > alpha:
+        with _shared_alpha.get_lock():
+            if score > _shared_alpha.value:
+                _shared_alpha.value = score
+    return index, move, score, alpha, search.nodes - nodes, search.qnodes - qnodes
+
+
+class ParallelSearch:
+    # Root-splitting search over a process pool. Iterations up to depth - 1 run serially in this process, exactly as
+    # Search.iterative_deepening would, which fixes the root move order. The final iteration searches the first move
+    # here to get a bound, then hands the remaining root moves to the workers, who share the best score so far
+    # through `shared_alpha`. Each worker keeps its table and move-ordering history across the root moves it
+    # handles. Ties are settled in serial root order, so at a fixed depth with the selectivity switches off the
+    # chosen move matches the serial search. Null move and LMR depend on table state, which the workers do not
+    # share, so with them on the move can differ.
+
+    def __init__(self, workers=None, use_bitboards=False, tt_size_mb=16, personality="machine",
+                 pvs=False, null_move=False, lmr=False, check_extensions=False):
+        self.workers = workers or os.cpu_count() or 1
+        self.options = {
+            "use_bitboards": use_bitboards,
+            "tt_size_mb": tt_size_mb,
+            "personality": personality,
+            "pvs": pvs,
+            "null_move": null_move,
+            "lmr": lmr,
+            "check_extensions": check_extensions,
+        }
+        self.search = Search(**self.options)
+        self.shared_alpha = multiprocessing.Value('d', float('-inf'))
+        self.stop_flag = multiprocessing.Value('b', 0)
+        self.pool = None
+        self.search_id = 0
+        self.nodes = 0
+        self.qnodes = 0
+
+    def get_pool(self):
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                            initargs=(self.shared_alpha, self.stop_flag))
+        return self.pool
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def find_best_move(self, board, color, depth, time_limit=None):
+        best_move, _ = self.search_fixed_depth(board, color, depth, time_limit)
+        return best_move
+
+    def search_fixed_depth(self, board, color, depth, time_limit=None):
+        board = ArrayBoard.coerce(board, color).copy()
+        search = self.search
+        start = time.perf_counter()
+        deadline = time.time() + time_limit if time_limit is not None else None
+        # Only the hard limit applies: the serial part must not stop early on the soft limit
+        best_move, best_score = search.iterative_deepening(board, color, depth - 1, time_limit,
+                                                           soft_time_limit=time_limit)
+        if len(search.iterations) < depth - 1:
+            return best_move, best_score  # out of time before the last iteration
+        if time_limit is not None:
+            search.hard_deadline = start + time_limit
+
+        search.root_depth = depth
+        moves = search.root_moves(board, color)
+        if not moves:
+            return None, None
+        in_check = search.generator.is_in_check(board, color)
+        try:
+            first_score = search.search_move(board, moves[0], 0, depth, float('-inf'), float('inf'), color, 0,
+                                             in_check)
+        except SearchAborted:
+            return best_move, best_score
+        search.following_pv = False
+        self.nodes, self.qnodes = search.nodes, search.qnodes
+
+        results = [(0, moves[0], first_score, float('-inf'))]
+        if len(moves) > 1:
+            self.shared_alpha.value = first_score
+            self.stop_flag.value = 0
+            self.search_id += 1
+            pool = self.get_pool()
+            futures = [pool.submit(_search_root_move, board, color, depth, index, move, first_score, self.options,
+                                   deadline, self.search_id)
+                       for index, move in enumerate(moves) if index > 0]
+            for future in futures:
+                try:
+                    timeout = max(0.0, deadline - time.time()) if deadline is not None else None
+                    index, move, score, alpha, nodes, qnodes = future.result(timeout)
+                except TimeoutError:
+                    score = None
+                if score is None:
+                    # cancel() only drops queued moves; the running ones see the stop flag
+                    self.stop_flag.value = 1
+                    for pending in futures:
+                        pending.cancel()
+                    return best_move, best_score
+                self.nodes += nodes
+                self.qnodes += qnodes
+                results.append((index, move, score, alpha))
+
+        results.sort(key=lambda result: result[0])
+        try:
+            best_index, final_move, final_score = self.pick_best(board, color, depth, results, in_check)
+        except SearchAborted:
+            return best_move, best_score
+        search.tt.store(position_key(board, color), depth, EXACT, final_score, final_move)
+        elapsed = time.perf_counter() - start
+        search.iterations.append({
+            "depth": depth,
+            "score": final_score,
+            "pv": search.extract_pv(board, color, depth),
+            "nodes": self.nodes,
+            "qnodes": self.qnodes,
+            "time": round(elapsed, 3),
+            "nps": int(self.nodes / elapsed) if elapsed > 0 else 0,
+            "workers": self.workers,
+        })
+        return final_move, final_score
+
+    def pick_best(self, board, color, depth, results, in_check):
+        # A score above the alpha a move was searched with is exact; anything else is only an upper bound.
+        # The serial search keeps the first move reaching the maximum, so an earlier move whose bound equals
+        # the maximum is re-searched with a full window here to see whether it ties.
+        best_index, best_move, best_score = None, None, float('-inf')
+        for index, move, score, alpha in results:
+            if score > alpha and score > best_score:
+                best_index, best_move, best_score = index, move, score
+
+        for index, move, score, alpha in results:
+            if index >= best_index:
+                break
+            if score >= best_score:
+                exact = self.search.search_move(board, move, 0, depth, float('-inf'), float('inf'), color, 0,
+                                                in_check)
+                if exact >= best_score:
+                    return index, move, exact
+        return best_index, best_move, best_score
+
+
+def find_best_move_parallel(board, color, depth, workers=None, use_bitboards=False, tt_size_mb=16, time_limit=None):
+    with ParallelSearch(workers, use_bitboards=use_bitboards, tt_size_mb=tt_size_mb) as search:
+        return search.find_best_move(board, color, depth, time_limit)
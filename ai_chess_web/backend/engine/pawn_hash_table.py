@@ -0,0 +1,51 @@
+# Rough CPython footprint of one entry: key plus the pawn terms of both colours
+ENTRY_BYTES = 200
+
+
+class PawnHashTable:
+    # Direct-mapped, always-replace cache of pawn-structure terms keyed by the pawn-only Zobrist key.
+    # Entries are (key, white_terms, black_terms), terms being (doubled, isolated, passed).
+
+    def __init__(self, size_mb=2):
+        self.size_mb = size_mb
+        self.entry_count = max(1, int(size_mb * 1024 * 1024) // ENTRY_BYTES)
+        self.clear()
+
+    def clear(self):
+        self.entries = [None] * self.entry_count
+        self.filled = 0
+        self.hits = 0
+        self.misses = 0
+        self.replacements = 0
+
+    def probe(self, key):
+        entry = self.entries[key % self.entry_count]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def store(self, key, white_terms, black_terms):
+        index = key % self.entry_count
+        current = self.entries[index]
+        if current is None:
+            self.filled += 1
+        elif current[0] != key:
+            self.replacements += 1
+        entry = self.entries[index] = (key, white_terms, black_terms)
+        return entry
+
+    def hit_rate(self):
+        probes = self.hits + self.misses
+        return round(self.hits / probes, 4) if probes else 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate(),
+            "replacements": self.replacements,
+            "filled": self.filled,
+            "fill_rate": round(self.filled / self.entry_count, 4),
+        }
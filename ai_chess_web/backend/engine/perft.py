@@ -0,0 +1,103 @@
+import argparse
+import time
+
+from ai import get_move_generator, opponent
+from array_board import ArrayBoard
+from notation import move_to_uci
+
+# (name, FEN, published leaf counts for depth 1, 2, ...)
+PERFT_POSITIONS = [
+    ("start", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862, 4085603]),
+    ("rook endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238, 674624]),
+    ("promotions", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467, 422333]),
+    ("talkchess", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379, 2103487]),
+    ("middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594]),
+]
+
+
+def perft(generator, board, color, depth):
+    # Leaf count of the legal move tree; the last ply is counted without being played (bulk counting)
+    moves = generator.get_legal_moves(board, color)
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    nodes = 0
+    enemy = opponent(color)
+    for move in moves:
+        captured = board.make_move(move)
+        nodes += perft(generator, board, enemy, depth - 1)
+        board.unmake_move(move, captured)
+    return nodes
+
+
+def divide(generator, board, color, depth):
+    # Leaf count below each root move, for bisecting a mismatch against a reference engine
+    counts = {}
+    enemy = opponent(color)
+    for move in generator.get_legal_moves(board, color):
+        captured = board.make_move(move)
+        counts[move_to_uci(move)] = perft(generator, board, enemy, depth - 1)
+        board.unmake_move(move, captured)
+    return counts
+
+
+def run_perft(fen, depth, use_bitboards=True, show_divide=False):
+    generator = get_move_generator(use_bitboards)
+    board = ArrayBoard.from_fen(fen)
+    color = board.side
+    start = time.perf_counter()
+    if show_divide:
+        counts = divide(generator, board, color, depth)
+        for move in sorted(counts):
+            print(f"{move}: {counts[move]}")
+        nodes = sum(counts.values())
+    else:
+        nodes = perft(generator, board, color, depth)
+    elapsed = time.perf_counter() - start
+    nps = int(nodes / elapsed) if elapsed > 0 else 0
+    print(f"perft({depth}) = {nodes} in {elapsed:.3f}s ({nps} nps)")
+    return nodes, elapsed
+
+
+def run_perft_suite(max_depth=None, use_bitboards=True, verbose=True):
+    # Checks every corpus position at every published depth (capped at max_depth); returns the mismatches
+    generator = get_move_generator(use_bitboards)
+    failures = []
+    total_nodes, total_time = 0, 0.0
+    for name, fen, expected_counts in PERFT_POSITIONS:
+        depth_limit = len(expected_counts) if max_depth is None else min(len(expected_counts), max_depth)
+        board = ArrayBoard.from_fen(fen)
+        color = board.side
+        for depth in range(1, depth_limit + 1):
+            start = time.perf_counter()
+            nodes = perft(generator, board, color, depth)
+            elapsed = time.perf_counter() - start
+            total_nodes += nodes
+            total_time += elapsed
+            expected = expected_counts[depth - 1]
+            if nodes != expected:
+                failures.append((name, depth, expected, nodes))
+            if verbose:
+                status = "ok" if nodes == expected else f"FAIL (expected {expected})"
+                nps = int(nodes / elapsed) if elapsed > 0 else 0
+                print(f"  {name:<14} depth {depth}: {nodes:>9} {elapsed:>8.3f}s {nps:>9} nps  {status}")
+
+    if verbose:
+        nps = int(total_nodes / total_time) if total_time > 0 else 0
+        print(f"\n♟️ Perft suite: {total_nodes} nodes in {total_time:.2f}s ({nps} nps), {len(failures)} failures")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Perft move-generation counts")
+    parser.add_argument("depth", type=int, nargs="?", help="depth for a single position (default: run the suite)")
+    parser.add_argument("--fen", default=PERFT_POSITIONS[0][1])
+    parser.add_argument("--divide", action="store_true", help="print the leaf count below each root move")
+    parser.add_argument("--scanning", action="store_true", help="use the scanning generator instead of bitboards")
+    parser.add_argument("--max-depth", type=int, help="cap the suite depth")
+    args = parser.parse_args()
+    if args.depth is None:
+        run_perft_suite(args.max_depth, use_bitboards=not args.scanning)
+    else:
+        run_perft(args.fen, args.depth, not args.scanning, args.divide)
@@ -1,39 +1,149 @@
+import atexit
+import copy
 import json
 import os
 import random
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 from personality_utils import DEFAULT_STATS, DEFAULT_WEIGHTS
 
+STAT_KEYS = {"win": "wins", "loss": "losses", "draw": "draws"}
+# Write-behind defaults: buffered game results are written after this many updates or this many seconds,
+# whichever comes first
+FLUSH_EVERY = 50
+FLUSH_INTERVAL = 10.0
+
+
+@contextmanager
+def file_lock(path):
+    # Exclusive lock on a side file, held across the read-merge-write of the stats and weights files so
+    # several processes can record results into the same store
+    with open(path, "a+") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def write_json_atomic(path, data):
+    # Readers see either the old file or the new one, never a half-written file
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def read_json(path, default_data):
+    if not os.path.exists(path):
+        return copy.deepcopy(default_data)
+    with open(path, "r") as f:
+        return json.load(f)
+
 
 class PersonalityManager:
-    def __init__(self, stats_path="stats.json", weights_path="weights.json", mutation_rate=0.02):
+    # Stats and weights live in memory and are written behind: update_stats only marks them dirty, and flush
+    # writes both files once per FLUSH_EVERY updates or FLUSH_INTERVAL seconds, plus at exit. A flush locks the
+    # store, re-reads it and applies this manager's changes since its last flush on top, so concurrent writers
+    # add up instead of overwriting each other. Call flush() before reading the files from elsewhere.
+
+    def __init__(self, stats_path="stats.json", weights_path="weights.json", mutation_rate=0.02,
+                 flush_every=FLUSH_EVERY, flush_interval=FLUSH_INTERVAL):
         self.stats_path = stats_path
         self.weights_path = weights_path
+        self.lock_path = stats_path + ".lock"
         self.mutation_rate = mutation_rate
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.pending = 0
+        self.last_flush = time.monotonic()
+
+        with file_lock(self.lock_path):
+            self.stats = self._load_or_create_file(self.stats_path, DEFAULT_STATS)
+            self.weights = self._load_or_create_file(self.weights_path, DEFAULT_WEIGHTS)
+        # What the files held at the last sync; the difference to it is what a flush merges in
+        self.synced_stats = copy.deepcopy(self.stats)
+        self.synced_weights = copy.deepcopy(self.weights)
+        atexit.register(self.flush)
 
-        self.stats = self._load_or_create_file(self.stats_path, DEFAULT_STATS)
-        self.weights = self._load_or_create_file(self.weights_path, DEFAULT_WEIGHTS)
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
 
     def _load_or_create_file(self, path, default_data):
         if not os.path.exists(path):
-            with open(path, "w") as f:
-                json.dump(default_data, f, indent=2)
-            return default_data.copy()
-        with open(path, "r") as f:
-            return json.load(f)
+            write_json_atomic(path, default_data)
+        return read_json(path, default_data)
 
     def save(self):
-        with open(self.stats_path, "w") as f:
-            json.dump(self.stats, f, indent=2)
-        with open(self.weights_path, "w") as f:
-            json.dump(self.weights, f, indent=2)
+        # Writes the in-memory state as is, replacing whatever the files hold
+        with file_lock(self.lock_path):
+            write_json_atomic(self.stats_path, self.stats)
+            write_json_atomic(self.weights_path, self.weights)
+            self.mark_synced()
+
+    def flush(self):
+        if not self.pending:
+            return
+        with file_lock(self.lock_path):
+            stats = read_json(self.stats_path, DEFAULT_STATS)
+            weights = read_json(self.weights_path, DEFAULT_WEIGHTS)
+            for personality, counts in self.stats.items():
+                synced = self.synced_stats.get(personality, {})
+                merged = stats.setdefault(personality, {key: 0 for key in counts})
+                for key, value in counts.items():
+                    merged[key] = merged.get(key, 0) + value - synced.get(key, 0)
+            for personality, values in self.weights.items():
+                synced = self.synced_weights.get(personality, {})
+                merged = weights.setdefault(personality, dict(values))
+                for key, value in values.items():
+                    merged[key] = round(merged.get(key, value) + value - synced.get(key, value), 6)
+                    if key != "risk_penalty":
+                        merged[key] = max(0.0, min(1.0, merged[key]))
+            write_json_atomic(self.stats_path, stats)
+            write_json_atomic(self.weights_path, weights)
+            self.stats, self.weights = stats, weights
+            self.mark_synced()
+
+    def mark_synced(self):
+        self.synced_stats = copy.deepcopy(self.stats)
+        self.synced_weights = copy.deepcopy(self.weights)
+        self.pending = 0
+        self.last_flush = time.monotonic()
 
     def update_stats(self, personality, result):
-        if result not in ["win", "loss", "draw"]:
+        if result not in STAT_KEYS:
             return
-        self.stats[personality][result + "s"] += 1
+        self.stats[personality][STAT_KEYS[result]] += 1
         self.tune_weights(personality)
-        self.save()
+        self.pending += 1
+        if self.pending >= self.flush_every or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
 
     def tune_weights(self, personality):
         stats = self.stats[personality]
@@ -61,8 +171,8 @@ class PersonalityManager:
         return random.choice(list(self.weights.keys()))
 
     def reset_all(self):
-        self.stats = DEFAULT_STATS.copy()
-        self.weights = DEFAULT_WEIGHTS.copy()
+        self.stats = copy.deepcopy(DEFAULT_STATS)
+        self.weights = copy.deepcopy(DEFAULT_WEIGHTS)
         self.save()
         print("All stats and weights have been reset to defaults.")
 
@@ -17,6 +17,14 @@ DEFAULT_WEIGHTS = {
     "machine": {"structure": 0.4, "mobility": 0.5, "center": 0.25}
 }
 
+# Personality outcome per game result, from white's side first
+OUTCOMES = {"1-0": ("win", "loss"), "0-1": ("loss", "win"), "1/2-1/2": ("draw", "draw")}
+
+
+def personality_result(result, color):
+    # "1-0" -> "win" for white and "loss" for black, as PersonalityManager.update_stats expects
+    return OUTCOMES[result][0 if color == "w" else 1]
+
 
 def ensure_weights_file(path="weights.json", reset=False):
     if not reset and os.path.exists(path):
@@ -0,0 +1,41 @@
+PIECE_VALUES = {"P": 1, "N": 3, "B": 3, "R": 5, "Q": 9, "K": 0}
+
+PAWN_TABLE = [
+    [0, 0, 0, 0, 0, 0, 0, 0],
+    [5, 5, 5, -5, -5, 5, 5, 5],
+    [1, 1, 2, 3, 3, 2, 1, 1],
+    [0.5, 0.5, 1, 2.5, 2.5, 1, 0.5, 0.5],
+    [0, 0, 0, 2, 2, 0, 0, 0],
+    [0.5, -0.5, -1, 0, 0, -1, -0.5, 0.5],
+    [0.5, 1, 1, -2, -2, 1, 1, 0.5],
+    [0, 0, 0, 0, 0, 0, 0, 0]
+]
+KNIGHT_TABLE = [
+    [-5, -4, -3, -3, -3, -3, -4, -5],
+    [-4, -2, 0, 0.5, 0.5, 0, -2, -4],
+    [-3, 0.5, 1, 1.5, 1.5, 1, 0.5, -3],
+    [-3, 0, 1.5, 2, 2, 1.5, 0, -3],
+    [-3, 0.5, 1.5, 2, 2, 1.5, 0.5, -3],
+    [-3, 0, 1, 1.5, 1.5, 1, 0, -3],
+    [-4, -2, 0, 0, 0, 0, -2, -4],
+    [-5, -4, -3, -3, -3, -3, -4, -5]
+]
+POSITIONAL_TABLES = {"P": PAWN_TABLE, "N": KNIGHT_TABLE}
+
+
+def signed_tables(piece_names):
+    # White-positive material and square bonus per piece code, black using the vertically mirrored table
+    material = [0] * 16
+    positional = [[0] * 64 for _ in range(16)]
+    for code, name in piece_names.items():
+        if not name.strip():
+            continue
+        sign = 1 if name[0] == "w" else -1
+        material[code] = sign * PIECE_VALUES[name[1]]
+        table = POSITIONAL_TABLES.get(name[1])
+        if table is None:
+            continue
+        for sq in range(64):
+            row, col = divmod(sq, 8)
+            positional[code][sq] = sign * (table[row][col] if sign == 1 else table[7 - row][col])
+    return material, positional
@@ -0,0 +1,132 @@
+import time
+
+from ai import Search, SEARCH_TECHNIQUES
+from evaluation_regression import REGRESSION_POSITIONS, board_from_placement
+from parallel_search import ParallelSearch
+
+
+def benchmark_configurations():
+    # Plain alpha-beta, each technique on its own, everything on, and everything but one technique
+    configurations = [("plain", {})]
+    configurations += [(f"+{name}", {name: True}) for name in SEARCH_TECHNIQUES]
+    everything = {name: True for name in SEARCH_TECHNIQUES}
+    configurations.append(("all", everything))
+    configurations += [(f"all -{name}", dict(everything, **{name: False})) for name in SEARCH_TECHNIQUES]
+    return configurations
+
+
+def benchmark_positions():
+    # One entry per distinct placement and side of the evaluation regression corpus
+    seen = set()
+    positions = []
+    for name, placement, color, _, _ in REGRESSION_POSITIONS:
+        if (placement, color) not in seen:
+            seen.add((placement, color))
+            positions.append((name, board_from_placement(placement), color))
+    return positions
+
+
+def run_benchmark(depth=4, positions=None, configurations=None, verbose=True):
+    # Fixed-depth search of every position under every configuration; returns one row per configuration
+    positions = positions or benchmark_positions()
+    configurations = configurations or benchmark_configurations()
+    rows = []
+    for label, options in configurations:
+        row = {"config": label, "nodes": 0, "qnodes": 0, "time": 0.0, "moves": []}
+        for _, board, color in positions:
+            search = Search(**options)
+            start = time.perf_counter()
+            move, _ = search.iterative_deepening(board, color, depth)
+            row["time"] += time.perf_counter() - start
+            row["nodes"] += search.nodes
+            row["qnodes"] += search.qnodes
+            row["moves"].append(move)
+        row["time"] = round(row["time"], 3)
+        row["nps"] = int(row["nodes"] / row["time"]) if row["time"] > 0 else 0
+        rows.append(row)
+
+    if verbose:
+        baseline = rows[0]["nodes"] or 1
+        print(f"\n📊 Search benchmark: depth {depth}, {len(positions)} positions")
+        print(f"  {'config':<22}{'nodes':>10}{'qnodes':>10}{'vs plain':>10}{'time':>9}{'nps':>8}  same moves")
+        for row in rows:
+            same = sum(a == b for a, b in zip(row["moves"], rows[0]["moves"]))
+            print(f"  {row['config']:<22}{row['nodes']:>10}{row['qnodes']:>10}"
+                  f"{row['nodes'] / baseline:>9.0%} {row['time']:>8.2f}s{row['nps']:>8}  {same}/{len(positions)}")
+    return rows
+
+
+def run_backend_check(depth=4, positions=None, configurations=None, verbose=True):
+    # Both move generators list the same moves in the same order, so every configuration must pick the same move
+    # and score with either one. Returns the (config, position) pairs where they differ.
+    positions = positions or benchmark_positions()
+    configurations = configurations or benchmark_configurations()
+    mismatches = []
+    for label, options in configurations:
+        for name, board, color in positions:
+            results = [Search(use_bitboards=use_bitboards, **options).iterative_deepening(board, color, depth)
+                       for use_bitboards in (False, True)]
+            if results[0] != results[1]:
+                mismatches.append((label, name))
+    if verbose:
+        checked = len(positions) * len(configurations)
+        print(f"\n🔁 Backends agree on {checked - len(mismatches)}/{checked} searches at depth {depth}")
+        for label, name in mismatches:
+            print(f"  ❌ {label}: {name}")
+    return mismatches
+
+
+def run_parallel_benchmark(depth=4, workers=None, positions=None, verbose=True):
+    # Serial iterative deepening against ParallelSearch at the same depth, wall time and nodes per position. The
+    # pool is started before timing, as an engine service keeps it running between searches.
+    positions = positions or benchmark_positions()
+    rows = []
+    with ParallelSearch(workers) as parallel:
+        parallel.get_pool().submit(int).result()
+        for name, board, color in positions:
+            search = Search()
+            start = time.perf_counter()
+            serial_move, _ = search.iterative_deepening(board, color, depth)
+            serial_time = time.perf_counter() - start
+            start = time.perf_counter()
+            parallel_move, _ = parallel.search_fixed_depth(board, color, depth)
+            parallel_time = time.perf_counter() - start
+            rows.append({"position": name, "serial_time": serial_time, "parallel_time": parallel_time,
+                         "serial_nodes": search.nodes, "parallel_nodes": parallel.nodes,
+                         "same_move": serial_move == parallel_move})
+        workers = parallel.workers
+
+    if verbose:
+        print(f"\n📊 Serial vs parallel search: depth {depth}, {workers} workers")
+        print(f"  {'position':<28}{'serial':>9}{'parallel':>10}{'speedup':>9}{'nodes':>9}  same move")
+        for row in rows + [{
+            "position": "total",
+            "serial_time": sum(row["serial_time"] for row in rows),
+            "parallel_time": sum(row["parallel_time"] for row in rows),
+            "serial_nodes": sum(row["serial_nodes"] for row in rows),
+            "parallel_nodes": sum(row["parallel_nodes"] for row in rows),
+            "same_move": all(row["same_move"] for row in rows),
+        }]:
+            print(f"  {row['position']:<28}{row['serial_time']:>8.2f}s{row['parallel_time']:>9.2f}s"
+                  f"{row['serial_time'] / row['parallel_time']:>8.2f}x"
+                  f"{row['parallel_nodes'] / (row['serial_nodes'] or 1):>9.0%}  {row['same_move']}")
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the search configurations")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--parallel", action="store_true", help="compare serial and parallel search instead")
+    parser.add_argument("--backends", action="store_true",
+                        help="check that both move generators lead to the same moves instead")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    if args.parallel:
+        run_parallel_benchmark(args.depth, args.workers)
+    elif args.backends:
+        raise SystemExit(1 if run_backend_check(args.depth) else 0)
+    else:
+        run_benchmark(args.depth)
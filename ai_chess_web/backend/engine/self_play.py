@@ -0,0 +1,196 @@
+import random
+import time
+
+from ai import Search, MATE_SCORE, SEARCH_TECHNIQUES, get_move_generator
+from array_board import ArrayBoard, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, BLACK
+from evaluation import Evaluation
+from game_io import PgnGame, START_FEN
+
+# Defaults sized for tuning runs of thousands of games: shallow searches, a per-move node budget and adjudication
+DEFAULT_DEPTH = 2
+DEFAULT_NODE_LIMIT = 3000
+MAX_PLIES = 300
+# Scores are in pawns from white's point of view. A game is decided once both engines have seen one side at least
+# RESIGN_SCORE ahead for RESIGN_PLIES plies in a row, and drawn once the score stayed within DRAW_SCORE for
+# DRAW_PLIES plies after DRAW_MIN_PLY.
+RESIGN_SCORE = 8
+RESIGN_PLIES = 6
+DRAW_SCORE = 0.15
+DRAW_PLIES = 20
+DRAW_MIN_PLY = 80
+# Searches kept per personality, one per weight version
+WEIGHT_VERSIONS = 2
+
+
+def is_insufficient_material(board):
+    # Bare kings, a single minor piece, or only bishops that all stand on squares of one colour
+    pieces = board.pieces
+    if any(pieces[bit | piece] for bit in (0, BLACK) for piece in (PAWN, ROOK, QUEEN)):
+        return False
+    knights = len(pieces[KNIGHT]) + len(pieces[BLACK | KNIGHT])
+    bishops = pieces[BISHOP] | pieces[BLACK | BISHOP]
+    if knights + len(bishops) <= 1:
+        return True
+    return not knights and len({((sq >> 3) + (sq & 7)) & 1 for sq in bishops}) == 1
+
+
+def draw_reason(board, plies, max_plies):
+    # Rule-based draws, checked before the side to move searches; mate and stalemate are checked first
+    if board.repetitions() >= 2:
+        return "threefold repetition"
+    if board.is_fifty_move_draw():
+        return "fifty-move rule"
+    if is_insufficient_material(board):
+        return "insufficient material"
+    if plies >= max_plies:
+        return "move limit"
+    return None
+
+
+def adjudicate(scores):
+    # scores: white-point-of-view search scores of the plies played so far
+    recent = scores[-RESIGN_PLIES:]
+    if len(recent) == RESIGN_PLIES:
+        if all(score >= RESIGN_SCORE for score in recent):
+            return "1-0", "adjudication"
+        if all(score <= -RESIGN_SCORE for score in recent):
+            return "0-1", "adjudication"
+    recent = scores[-DRAW_PLIES:]
+    if len(scores) >= DRAW_MIN_PLY and len(recent) == DRAW_PLIES and all(abs(score) <= DRAW_SCORE for score in recent):
+        return "1/2-1/2", "adjudication"
+    return None, None
+
+
+def random_opening(plies, rng=random, start_fen=None, generator=None):
+    # A few random legal moves to start from, so repeated pairings do not replay the same deterministic game
+    generator = generator or get_move_generator(True)
+    board = ArrayBoard.from_fen(start_fen or START_FEN)
+    moves = []
+    for _ in range(plies):
+        legal_moves = generator.get_legal_moves(board, board.side)
+        if not legal_moves:
+            break
+        move = rng.choice(legal_moves)
+        board.make_move(move)
+        moves.append(move)
+    return moves
+
+
+class SelfPlay:
+    # Plays engine-vs-engine games. Like EngineService it keeps one evaluator (and its pawn hash) and Searches
+    # alive across games, so transposition tables and move tables stay warm over a whole run.
+
+    def __init__(self, depth=DEFAULT_DEPTH, time_limit=None, node_limit=DEFAULT_NODE_LIMIT, max_plies=MAX_PLIES,
+                 use_adjudication=True, use_bitboards=True, tt_size_mb=4, pawn_hash_mb=2, **techniques):
+        # time_limit is the per-move time control in seconds; node_limit a per-move node budget, which unlike a
+        # clock gives the same game on every machine
+        self.depth = depth
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.max_plies = max_plies
+        self.use_adjudication = use_adjudication
+        self.use_bitboards = use_bitboards
+        self.tt_size_mb = tt_size_mb
+        self.techniques = {name: techniques.get(name, False) for name in SEARCH_TECHNIQUES}
+        self.evaluator = Evaluation(pawn_hash_mb=pawn_hash_mb)
+        self.searches = {}
+        self.games_played = 0
+
+    def search_for(self, personality, weights=None):
+        # One Search per personality and weight version, so stored scores always belong to the weights they were
+        # computed with. Tuning can change the weights after every game, so a personality keeps at most
+        # WEIGHT_VERSIONS of them: a new version takes over the least recently used one, whose table drops its
+        # scores but keeps its best moves for move ordering.
+        weights = dict(weights) if weights else None
+        key = (personality, tuple(sorted(weights.items())) if weights else None)
+        search = self.searches.pop(key, None)
+        if search is None:
+            versions = [version for version in self.searches if version[0] == personality]
+            if len(versions) >= WEIGHT_VERSIONS:
+                search = self.searches.pop(versions[0])
+                search.weights = weights
+                search.tt.keep_moves_only()
+            else:
+                search = Search(use_bitboards=self.use_bitboards, tt_size_mb=self.tt_size_mb,
+                                personality=personality, evaluator=self.evaluator, weights=weights,
+                                **self.techniques)
+        self.searches[key] = search  # most recently used last
+        return search
+
+    def play_game(self, white, black, weights=None, opening=None, start_fen=None, headers=None):
+        # white/black are personality names; weights optionally maps a personality to its current weights and
+        # opening is a list of moves played before the engines take over. Returns the result ("1-0", "0-1",
+        # "1/2-1/2"), how the game ended, the moves and a PgnGame.
+        weights = weights or {}
+        players = {"w": self.search_for(white, weights.get(white)), "b": self.search_for(black, weights.get(black))}
+        board = ArrayBoard.from_fen(start_fen or START_FEN)
+        generator = players["w"].generator
+        moves, scores = [], []
+        for move in opening or ():
+            board.make_move(move)
+            moves.append(move)
+        nodes = 0
+        start = time.perf_counter()
+
+        while True:
+            color = board.side
+            if not generator.get_legal_moves(board, color):
+                if generator.is_in_check(board, color):
+                    result, termination = ("0-1" if color == "w" else "1-0"), "checkmate"
+                else:
+                    result, termination = "1/2-1/2", "stalemate"
+                break
+            termination = draw_reason(board, len(moves), self.max_plies)
+            if termination:
+                result = "1/2-1/2"
+                break
+
+            search = players[color]
+            move, score = search.iterative_deepening(board, color, self.depth, self.time_limit,
+                                                     node_limit=self.node_limit)
+            nodes += search.nodes
+            board.make_move(move)
+            moves.append(move)
+            if score is not None:
+                scores.append(score if color == "w" else -score)
+                if abs(score) >= MATE_SCORE / 2:
+                    continue  # a found mate is played out rather than adjudicated
+            if self.use_adjudication:
+                result, termination = adjudicate(scores)
+                if result:
+                    break
+
+        self.games_played += 1
+        elapsed = time.perf_counter() - start
+        pgn_headers = {"Event": "Self-play", "Round": self.games_played, "White": white, "Black": black,
+                       "Termination": termination, "PlyCount": len(moves)}
+        pgn_headers.update(headers or {})
+        return {
+            "white": white,
+            "black": black,
+            "result": result,
+            "termination": termination,
+            "plies": len(moves),
+            "moves": moves,
+            "nodes": nodes,
+            "time": round(elapsed, 3),
+            "pgn": PgnGame.from_moves(moves, pgn_headers, result, start_fen, generator),
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Play one engine-vs-engine game and print its PGN")
+    parser.add_argument("white", nargs="?", default="machine")
+    parser.add_argument("black", nargs="?", default="gambiteer")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH)
+    parser.add_argument("--time-limit", type=float, help="seconds per move")
+    parser.add_argument("--node-limit", type=int, default=DEFAULT_NODE_LIMIT, help="nodes per move, 0 for none")
+    parser.add_argument("--random-plies", type=int, default=0, help="random opening moves before the engines play")
+    args = parser.parse_args()
+    self_play = SelfPlay(args.depth, args.time_limit, args.node_limit or None)
+    game = self_play.play_game(args.white, args.black, opening=random_opening(args.random_plies))
+    print(game["pgn"].to_pgn())
+    print(f"♟️ {game['result']} by {game['termination']} after {game['plies']} plies, "
+          f"{game['nodes']} nodes in {game['time']}s")
@@ -1,33 +1,73 @@
 import random
-from ai_chess_web.backend.engine.personality_manager import PersonalityManager
-from visualize import show_dashboard
+from personality_manager import PersonalityManager
+from personality_utils import personality_result
+from game_io import write_pgn
+from self_play import SelfPlay, random_opening
+from tournament_scheduler import database_ingestor, run_scheduled_tournament
+from visualize import HEADLESS, render_dashboards, show_dashboard
 
 
 PERSONALITIES = ["positionalist", "gambiteer", "grinder", "romantic", "machine"]
+# Random opening moves before the engines take over; the searches are deterministic, so without them every game
+# of a pairing would be the same
+OPENING_PLIES = 4
 
 
-# Mock game simulation – replace with your actual game logic
-def simulate_game(personality_name):
-    result = random.choices(["win", "loss", "draw"], weights=[0.45, 0.4, 0.15])[0]
-    print(f"🎮 Simulated {personality_name} → {result}")
-    return result
+def simulate_game(personality_name, opponent, color="w", self_play=None, manager=None, rng=random):
+    # Plays one real engine game and returns it with the result from personality_name's point of view
+    self_play = self_play or SelfPlay()
+    white, black = (personality_name, opponent) if color == "w" else (opponent, personality_name)
+    weights = {name: manager.get_weights(name) for name in (white, black)} if manager else None
+    game = self_play.play_game(white, black, weights, opening=random_opening(OPENING_PLIES, rng))
+    game["outcome"] = personality_result(game["result"], color)
+    print(f"🎮 {white} vs {black} → {game['result']} ({game['termination']}, {game['plies']} plies) "
+          f"→ {personality_name} {game['outcome']}")
+    return game
 
 
-def run_tournament(personality, rounds=20, manager=None):
+def run_tournament(personality, rounds=20, manager=None, self_play=None, pgn_path=None, dashboard=True):
+    # The personality meets every other one in turn, alternating colours; games are appended to pgn_path if given
     print(f"\n🏁 Running {rounds} games as {personality}")
     if manager is None:
         manager = PersonalityManager()
+    if self_play is None:
+        self_play = SelfPlay()
 
+    opponents = [name for name in PERSONALITIES if name != personality] or [personality]
+    games = []
     for i in range(rounds):
-        result = simulate_game(personality)
-        manager.update_stats(personality, result)
+        color = "w" if i % 2 == 0 else "b"
+        game = simulate_game(personality, opponents[i % len(opponents)], color, self_play, manager)
+        manager.update_stats(personality, game["outcome"])
+        games.append(game)
 
+    if pgn_path:
+        write_pgn(pgn_path, (game["pgn"] for game in games), mode="a")
+    manager.flush()
     manager.log_personality_update(personality)
 
-    show_dashboard(personality=personality)
+    if dashboard:
+        show_dashboard(personality=personality)
+    return games
 
 
-def run_all_tournaments(rounds_per_style=20):
+def run_all_tournaments(rounds_per_style=20, workers=None, journal_path=None, pgn_path=None, db=False):
+    # One round robin over all personalities, played across worker processes; every personality gets about
+    # rounds_per_style games. Pass the journal of an interrupted run to resume it. With db, every finished game
+    # and the weights after it are also stored in the database.
     pm = PersonalityManager()
+    games_per_opening = 2 * (len(PERSONALITIES) - 1)
+    openings = max(1, round(rounds_per_style / games_per_opening))
+    ingestor = database_ingestor() if db else None
+    run_scheduled_tournament(PERSONALITIES, openings=openings, workers=workers, manager=pm,
+                             journal_path=journal_path, pgn_path=pgn_path, weight_history_path="weight_history.json",
+                             on_result=ingestor.recorder(pm) if ingestor else None)
+    if ingestor is not None:
+        ingestor.flush()
     for personality in PERSONALITIES:
-        run_tournament(personality, rounds=rounds_per_style, manager=pm)
+        pm.log_personality_update(personality)
+    if HEADLESS:
+        render_dashboards(PERSONALITIES, workers=workers)
+    else:
+        for personality in PERSONALITIES:
+            show_dashboard(personality=personality)
@@ -0,0 +1,292 @@
+import itertools
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from array_board import ArrayBoard
+from game_io import START_FEN, read_pgn
+from notation import move_to_uci, parse_san
+from personality_manager import PersonalityManager, STAT_KEYS
+from personality_utils import personality_result
+from self_play import SelfPlay
+from weight_history import WeightHistory
+
+# Short, balanced opening lines in SAN. Every pairing plays each line twice with colours swapped, so neither
+# side profits from a lopsided opening.
+OPENING_BOOK = [
+    "e4 e5 Nf3 Nc6 Bb5",
+    "e4 e5 Nf3 Nc6 Bc4",
+    "e4 e5 Nf3 Nf6",
+    "e4 c5 Nf3 d6 d4",
+    "e4 c5 Nc3 Nc6",
+    "e4 e6 d4 d5",
+    "e4 c6 d4 d5",
+    "e4 d5 exd5 Qxd5",
+    "d4 d5 c4 e6",
+    "d4 d5 c4 c6",
+    "d4 Nf6 c4 g6 Nc3",
+    "d4 Nf6 c4 e6 Nc3 Bb4",
+    "d4 d5 Bf4",
+    "c4 e5 Nc3",
+    "Nf3 d5 g3",
+    "e4 e5 f4",
+]
+POINTS = {"win": 1.0, "draw": 0.5, "loss": 0.0}
+# Games queued per worker. Weights are read when a game is submitted, so a short queue keeps games close to the
+# latest tuned weights.
+QUEUE_PER_WORKER = 2
+# Rows buffered before live results are written to the database; the journal covers anything lost in a crash
+LIVE_BATCH_SIZE = 20
+
+# Per-process game player of pool workers, set up by _init_worker
+_self_play = None
+
+
+def _init_worker(self_play_options):
+    global _self_play
+    _self_play = SelfPlay(**self_play_options)
+
+
+def _play_pairing(pairing, opening, weights):
+    # Runs in a pool worker; the record it returns is plain data so it can go straight into the journal
+    game = _self_play.play_game(pairing["white"], pairing["black"], weights, opening=opening,
+                                headers={"Round": pairing["round"]})
+    return {
+        "id": pairing["id"],
+        "white": game["white"],
+        "black": game["black"],
+        "opening": pairing["opening"],
+        "result": game["result"],
+        "termination": game["termination"],
+        "plies": game["plies"],
+        "nodes": game["nodes"],
+        "time": game["time"],
+        "moves": [move_to_uci(move) for move in game["moves"]],
+        "pgn": game["pgn"].to_pgn(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def load_opening_book(path, max_plies=8):
+    # Opening lines from a PGN file, each game's main line cut to max_plies
+    return [" ".join(game.moves[:max_plies]) for game in read_pgn(path) if game.moves]
+
+
+def opening_moves(line):
+    board = ArrayBoard.from_fen(START_FEN)
+    moves = []
+    for san in line.split():
+        move = parse_san(board, san)
+        board.make_move(move)
+        moves.append(move)
+    return moves
+
+
+def _pairing(round_number, white, black, opening):
+    # The id names the game itself rather than its position in the schedule, so a resumed run recognises
+    # finished games even if the schedule is rebuilt in a different order
+    return {"id": f"{round_number}:{white}-{black}:{opening}", "round": round_number, "white": white,
+            "black": black, "opening": opening}
+
+
+def round_robin_pairings(players, openings=1, rounds=1):
+    # Every pair meets on each of the first `openings` book lines with both colours; later rounds start with the
+    # other colour so no player gets white in all its first games
+    pairings = []
+    for round_number in range(1, rounds + 1):
+        for opening in range(openings):
+            for first, second in itertools.combinations(players, 2):
+                if (round_number + opening) % 2 == 0:
+                    first, second = second, first
+                pairings.append(_pairing(round_number, first, second, opening))
+                pairings.append(_pairing(round_number, second, first, opening))
+    return pairings
+
+
+def gauntlet_pairings(challenger, opponents, openings=1, rounds=1):
+    # The challenger plays every opponent on each opening with both colours
+    pairings = []
+    for round_number in range(1, rounds + 1):
+        for opening in range(openings):
+            for opponent in opponents:
+                if opponent == challenger:
+                    continue
+                pairings.append(_pairing(round_number, challenger, opponent, opening))
+                pairings.append(_pairing(round_number, opponent, challenger, opening))
+    return pairings
+
+
+def read_journal(path):
+    # Finished games by id. A line cut short by a crash is ignored, so its game is simply played again.
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[record["id"]] = record
+    return records
+
+
+def standings(records):
+    # Points, games and per-outcome counts per player, best first
+    table = {}
+    for record in records:
+        for color, player in (("w", record["white"]), ("b", record["black"])):
+            row = table.setdefault(player, {"points": 0.0, "games": 0, "wins": 0, "losses": 0, "draws": 0})
+            outcome = personality_result(record["result"], color)
+            row["points"] += POINTS[outcome]
+            row["games"] += 1
+            row[STAT_KEYS[outcome]] += 1
+    return sorted(table.items(), key=lambda item: -item[1]["points"])
+
+
+class TournamentScheduler:
+    # Plays a list of pairings across a process pool. Each finished game is appended to the journal (and the PGN
+    # file) and fed into the stats store, in the order games finish. Restarting with the same journal skips the
+    # games it already holds. The journal is written before the stats, which the store buffers until its next
+    # flush, so a crash can drop the stats of recent games but never count a game twice.
+
+    def __init__(self, pairings, workers=None, manager=None, journal_path=None, pgn_path=None,
+                 book=None, weight_history_path=None, **self_play_options):
+        self.pairings = pairings
+        self.workers = workers or os.cpu_count() or 1
+        self.manager = manager
+        # A fresh run gets its own journal; pass an earlier run's journal to resume it
+        self.journal_path = journal_path or f"tournament_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.jsonl"
+        # Stamped on every record; with the game id it identifies a game when results are stored in the database
+        self.tournament = os.path.splitext(os.path.basename(self.journal_path))[0]
+        self.pgn_path = pgn_path
+        # With a manager, both players' weights after every game are appended here for plot_weight_evolution
+        self.weight_history = WeightHistory(weight_history_path) if weight_history_path else None
+        self.book = book or OPENING_BOOK
+        self.self_play_options = self_play_options
+        self.openings = {}
+
+    def opening(self, index):
+        if index not in self.openings:
+            self.openings[index] = opening_moves(self.book[index % len(self.book)])
+        return self.openings[index]
+
+    def current_weights(self, pairing):
+        if self.manager is None:
+            return None
+        return {name: self.manager.get_weights(name) for name in (pairing["white"], pairing["black"])}
+
+    def record(self, record):
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if self.pgn_path:
+            with open(self.pgn_path, "a", encoding="utf-8") as f:
+                f.write(record["pgn"] + "\n")
+        if self.manager is not None:
+            self.manager.update_stats(record["white"], personality_result(record["result"], "w"))
+            self.manager.update_stats(record["black"], personality_result(record["result"], "b"))
+            if self.weight_history is not None:
+                for name in (record["white"], record["black"]):
+                    self.weight_history.append(name, sum(self.manager.stats[name].values()),
+                                               self.manager.get_weights(name), record["timestamp"])
+
+    def run(self, on_result=None):
+        # Returns the records of every game in the schedule, including those finished by earlier runs
+        done = read_journal(self.journal_path)
+        pending = [pairing for pairing in self.pairings if pairing["id"] not in done]
+        print(f"\n🏁 {len(self.pairings)} games scheduled, {len(self.pairings) - len(pending)} already played, "
+              f"{self.workers} workers, journal {self.journal_path}")
+
+        pending.reverse()  # popped from the end
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.self_play_options,)) as pool:
+            running = set()
+            while pending or running:
+                while pending and len(running) < self.workers * QUEUE_PER_WORKER:
+                    pairing = pending.pop()
+                    running.add(pool.submit(_play_pairing, pairing, self.opening(pairing["opening"]),
+                                            self.current_weights(pairing)))
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record = future.result()
+                    record["tournament"] = self.tournament
+                    self.record(record)
+                    done[record["id"]] = record
+                    print(f"🎮 {record['white']} vs {record['black']} → {record['result']} "
+                          f"({record['termination']}, {record['plies']} plies)")
+                    if on_result is not None:
+                        on_result(record)
+
+        if self.manager is not None:
+            self.manager.flush()
+
+        return [done[pairing["id"]] for pairing in self.pairings if pairing["id"] in done]
+
+
+def database_ingestor(batch_size=LIVE_BATCH_SIZE):
+    # A ResultIngestor for storing games in the database as they finish. Sets Django up first, with mysite.settings
+    # unless DJANGO_SETTINGS_MODULE names other settings.
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if backend_dir not in sys.path:
+        sys.path.append(backend_dir)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mysite.settings")
+    import django
+    django.setup()
+    from ai_chess_web.backend.models.ingest import ResultIngestor
+    return ResultIngestor(batch_size)
+
+
+def run_scheduled_tournament(players, mode="round-robin", challenger=None, openings=1, rounds=1, workers=None,
+                             manager=None, journal_path=None, pgn_path=None, book=None, weight_history_path=None,
+                             on_result=None, **self_play_options):
+    # on_result is called with every finished game's record, e.g. ResultIngestor.recorder() to store it
+    if mode == "gauntlet":
+        pairings = gauntlet_pairings(challenger, players, openings, rounds)
+    else:
+        pairings = round_robin_pairings(players, openings, rounds)
+    scheduler = TournamentScheduler(pairings, workers, manager, journal_path, pgn_path, book, weight_history_path,
+                                    **self_play_options)
+    records = scheduler.run(on_result)
+    print("\n📊 Standings:")
+    for player, row in standings(records):
+        print(f"{player:<14} {row['points']:>5} / {row['games']:<4} +{row['wins']} ={row['draws']} -{row['losses']}")
+    return records
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from ai import PERSONALITIES
+
+    parser = argparse.ArgumentParser(description="Run a self-play tournament across worker processes")
+    parser.add_argument("--mode", choices=("round-robin", "gauntlet"), default="round-robin")
+    parser.add_argument("--challenger", default="machine", help="the gauntlet's challenger")
+    parser.add_argument("--openings", type=int, default=1, help="book lines per pairing, each played with both colours")
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--journal", help="journal of an interrupted run to resume")
+    parser.add_argument("--pgn", help="append finished games to this PGN file")
+    parser.add_argument("--book", help="PGN file with opening lines instead of the built-in book")
+    parser.add_argument("--depth", type=int)
+    parser.add_argument("--node-limit", type=int)
+    parser.add_argument("--time-limit", type=float, help="seconds per move")
+    parser.add_argument("--no-stats", action="store_true", help="do not update stats.json and weights.json")
+    parser.add_argument("--weight-history", default="weight_history.json", help="weight snapshot log")
+    parser.add_argument("--db", action="store_true", help="also store every finished game in the database")
+    args = parser.parse_args()
+
+    options = {name: value for name, value in (("depth", args.depth), ("node_limit", args.node_limit),
+                                                ("time_limit", args.time_limit)) if value is not None}
+    manager = None if args.no_stats else PersonalityManager()
+    ingestor = database_ingestor() if args.db else None
+    run_scheduled_tournament(PERSONALITIES, args.mode, args.challenger, args.openings, args.rounds, args.workers,
+                             manager, args.journal, args.pgn, load_opening_book(args.book) if args.book else None,
+                             args.weight_history, ingestor.recorder(manager) if ingestor else None, **options)
+    if ingestor is not None:
+        ingestor.flush()
+        print(f"🗄️ Stored {ingestor.written['results']} game results and {ingestor.written['snapshots']} weight "
+              f"snapshots")
@@ -0,0 +1,91 @@
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+# Rough footprint of one stored entry tuple in CPython, used to turn a size in MB into a slot count
+ENTRY_BYTES = 120
+
+
+class TranspositionTable:
+    # Each bucket has a depth-preferred slot and an always-replace slot.
+    # Entries are (key, depth, flag, score, best_move) tuples.
+
+    def __init__(self, size_mb=16):
+        self.size_mb = size_mb
+        self.bucket_count = max(1, int(size_mb * 1024 * 1024) // (2 * ENTRY_BYTES))
+        self.clear()
+
+    def clear(self):
+        self.depth_slots = [None] * self.bucket_count
+        self.always_slots = [None] * self.bucket_count
+        self.filled = 0
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def keep_moves_only(self):
+        # Drops every stored score but keeps the best moves for move ordering, e.g. once the evaluation changed.
+        # An entry of depth -1 never passes a probe's depth test.
+        for slots in (self.depth_slots, self.always_slots):
+            for index, entry in enumerate(slots):
+                if entry is not None:
+                    slots[index] = (entry[0], -1, entry[2], entry[3], entry[4])
+
+    def probe(self, key):
+        index = key % self.bucket_count
+        entry = self.depth_slots[index]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        other = self.always_slots[index]
+        if other is not None and other[0] == key:
+            self.hits += 1
+            return other
+        if entry is not None or other is not None:
+            self.collisions += 1
+        self.misses += 1
+        return None
+
+    def peek(self, key):
+        # Same as probe but leaves the hit/miss counters alone (PV extraction, reporting)
+        index = key % self.bucket_count
+        for entry in (self.depth_slots[index], self.always_slots[index]):
+            if entry is not None and entry[0] == key:
+                return entry
+        return None
+
+    def store(self, key, depth, flag, score, best_move):
+        index = key % self.bucket_count
+        entry = (key, depth, flag, score, best_move)
+        self.stores += 1
+
+        current = self.depth_slots[index]
+        if current is None or current[0] == key or depth >= current[1]:
+            if current is None:
+                self.filled += 1
+            elif current[0] != key:
+                self._demote(index, current)
+            self.depth_slots[index] = entry
+            return
+
+        if self.always_slots[index] is None:
+            self.filled += 1
+        self.always_slots[index] = entry
+
+    def _demote(self, index, entry):
+        # A shallower entry pushed out of the depth slot still overwrites the always-replace slot
+        if self.always_slots[index] is None:
+            self.filled += 1
+        self.always_slots[index] = entry
+
+    def fill_rate(self):
+        return round(self.filled / (2 * self.bucket_count), 4)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "collisions": self.collisions,
+            "stores": self.stores,
+            "filled": self.filled,
+            "fill_rate": self.fill_rate(),
+        }
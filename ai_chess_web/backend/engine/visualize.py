@@ -1,11 +1,29 @@
 import json
+import math
 import os
 import platform
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+import matplotlib
+
+# Hosts without a display (tournament servers, CI) render with Agg and never show windows or open viewers.
+# HEADLESS_REPORTS=1 forces this anywhere, HEADLESS_REPORTS=0 turns it off.
+_no_display = platform.system() == "Linux" and not (os.getenv("DISPLAY") or os.getenv("WAYLAND_DISPLAY"))
+HEADLESS = os.getenv("HEADLESS_REPORTS", "1" if _no_display else "0") == "1"
+if HEADLESS:
+    matplotlib.use("Agg")
+
 import matplotlib.pyplot as plt
-from collections import defaultdict
+
+from weight_history import WeightHistory
+
+# Snapshots drawn per weight before plot_weight_evolution starts thinning the series
+MAX_PLOT_POINTS = 5000
+
+# Set in render_dashboards workers, which read the weight history index the parent synced but never write it
+_read_only_history = False
 
 
 def get_timestamped_path(filename_base, folder="reports", extension="png"):
@@ -25,6 +43,29 @@ def open_file(filepath):
             subprocess.run(["xdg-open", filepath])
 
 
+def finish_figure(fig, filepath, interactive):
+    # Saves the figure, then either shows it (and opens the saved file) or just releases it. pyplot keeps every
+    # figure alive until it is closed, so a long headless run that skipped this would grow without bound.
+    try:
+        if filepath:
+            fig.savefig(filepath)
+            if interactive:
+                open_file(filepath)
+        if interactive:
+            plt.show()
+    finally:
+        plt.close(fig)
+
+
+def json_safe(data):
+    # JSON has no NaN; weights missing from a snapshot become null
+    if isinstance(data, dict):
+        return {key: json_safe(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [json_safe(value) for value in data]
+    return None if isinstance(data, float) and math.isnan(data) else data
+
+
 def export_snapshot_json(personality, stats_path, weights_path, out_folder):
     os.makedirs(out_folder, exist_ok=True)
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
@@ -47,18 +88,64 @@ def export_snapshot_json(personality, stats_path, weights_path, out_folder):
     print(f"📝 Stats + weights snapshot saved to {filename}")
 
 
-def show_dashboard(personality="machine", stats_path="stats.json", weights_path="weights.json"):
+def export_chart_json(personality, stats_path, history_path, out_folder, every=None, buckets=None):
+    # The data behind both dashboard charts, for the frontend to draw itself
+    os.makedirs(out_folder, exist_ok=True)
+    export = {
+        "timestamp": datetime.now().strftime("%Y-%m-%d_%H-%M-%S"),
+        "personality": personality,
+        "win_rates": win_rate_data(stats_path),
+        "weight_evolution": json_safe(weight_evolution_data(history_path, personality, every, buckets)),
+    }
+    filename = get_timestamped_path(f"charts_{personality}", folder=out_folder, extension="json")
+    with open(filename, "w") as f:
+        json.dump(export, f)
+    print(f"📝 Chart data saved to {filename}")
+    return filename
+
+
+def show_dashboard(personality="machine", stats_path="stats.json", weights_path="weights.json",
+                   history_path="weight_history.json", interactive=None, as_json=False):
+    # interactive defaults to False on headless hosts; as_json writes the chart data instead of PNGs
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     out_folder = os.path.join("reports", personality, f"session_{timestamp}")
     os.makedirs(out_folder, exist_ok=True)
 
     print(f"\n📊 Dashboard for personality: {personality}")
-    plot_win_rates(stats_path=stats_path, export=True, out_folder=out_folder)
-    plot_weight_evolution(personality=personality, export=True, out_folder=out_folder)
+    if as_json:
+        export_chart_json(personality, stats_path, history_path, out_folder)
+    else:
+        plot_win_rates(stats_path=stats_path, export=True, out_folder=out_folder, interactive=interactive)
+        plot_weight_evolution(history_path, personality=personality, export=True, out_folder=out_folder,
+                              interactive=interactive)
     export_snapshot_json(personality, stats_path, weights_path, out_folder)
+    return out_folder
+
+
+def _init_render_worker():
+    # Pool workers never have a display to draw on
+    global _read_only_history
+    plt.switch_backend("Agg")
+    _read_only_history = True
+
+
+def _render_dashboard(personality, stats_path, weights_path, history_path, as_json):
+    return show_dashboard(personality, stats_path, weights_path, history_path, interactive=False, as_json=as_json)
+
 
+def render_dashboards(personalities, stats_path="stats.json", weights_path="weights.json",
+                      history_path="weight_history.json", workers=None, as_json=False):
+    # Headless dashboards for several personalities at once, one per worker process; returns their folders
+    workers = min(workers or os.cpu_count() or 1, len(personalities)) or 1
+    if os.path.exists(history_path):
+        WeightHistory(history_path).sync()  # indexed once here; the workers only read
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker) as pool:
+        futures = [pool.submit(_render_dashboard, personality, stats_path, weights_path, history_path, as_json)
+                   for personality in personalities]
+        return [future.result() for future in futures]
 
-def plot_win_rates(stats_path="stats.json", export=True, out_folder="reports"):
+
+def win_rate_data(stats_path="stats.json"):
     with open(stats_path, "r") as f:
         stats = json.load(f)
 
@@ -72,62 +159,77 @@ def plot_win_rates(stats_path="stats.json", export=True, out_folder="reports"):
         win_rate = data["wins"] / total * 100
         personalities.append(name)
         win_rates.append(win_rate)
+    return {"personalities": personalities, "win_rates": win_rates}
 
-    plt.figure(figsize=(8, 5))
-    bars = plt.bar(personalities, win_rates, color="mediumslateblue")
-    plt.title("♟️ Personality Win Rates")
-    plt.ylabel("Win Rate (%)")
-    plt.ylim(0, 100)
-
-    for bar, rate in zip(bars, win_rates):
-        plt.text(bar.get_x() + bar.get_width() / 2, bar.get_height() + 1,
-                 f"{rate:.1f}%", ha='center', va='bottom')
-
-    plt.tight_layout()
-    if export:
-        filepath = get_timestamped_path("win_rates", folder=out_folder)
-        plt.savefig(filepath)
-        open_file(filepath)
-        print(f"📦 Win rate chart saved to {filepath}")
-    plt.show()
 
+def plot_win_rates(stats_path="stats.json", export=True, out_folder="reports", interactive=None):
+    interactive = not HEADLESS if interactive is None else interactive
+    data = win_rate_data(stats_path)
 
-def plot_weight_evolution(history_path="weight_history.json", personality="machine", export=True, out_folder="reports"):
-    data = defaultdict(list)
-    games = []
+    fig, ax = plt.subplots(figsize=(8, 5))
+    bars = ax.bar(data["personalities"], data["win_rates"], color="mediumslateblue")
+    ax.set_title("♟️ Personality Win Rates")
+    ax.set_ylabel("Win Rate (%)")
+    ax.set_ylim(0, 100)
 
-    try:
-        with open(history_path, "r") as f:
-            for line in f:
-                entry = json.loads(line)
-                if entry["personality"] != personality:
-                    continue
-                games.append(entry["game"])
-                for trait, value in entry["weights"].items():
-                    data[trait].append(value)
-    except FileNotFoundError:
+    for bar, rate in zip(bars, data["win_rates"]):
+        ax.text(bar.get_x() + bar.get_width() / 2, bar.get_height() + 1,
+                f"{rate:.1f}%", ha='center', va='bottom')
+
+    fig.tight_layout()
+    filepath = get_timestamped_path("win_rates", folder=out_folder) if export else None
+    finish_figure(fig, filepath, interactive)
+    if filepath:
+        print(f"📦 Win rate chart saved to {filepath}")
+
+
+def weight_evolution_data(history_path="weight_history.json", personality="machine", every=None, buckets=None):
+    # every: every Nth snapshot; buckets: each weight's min-max band over this many buckets instead. Without
+    # either, long histories are thinned to about MAX_PLOT_POINTS snapshots.
+    data = {"personality": personality, "games": []}
+    if not os.path.exists(history_path):
+        return data
+
+    history = WeightHistory(history_path, read_only=_read_only_history)
+    if buckets:
+        games, bands = history.buckets(personality, buckets)
+        data["bands"] = {trait: {"low": lows, "high": highs} for trait, (lows, highs) in bands.items()}
+    else:
+        games, weights = history.series(personality, every, MAX_PLOT_POINTS)
+        data["weights"] = weights
+    data["games"] = games
+    return data
+
+
+def plot_weight_evolution(history_path="weight_history.json", personality="machine", export=True, out_folder="reports",
+                          every=None, buckets=None, interactive=None):
+    interactive = not HEADLESS if interactive is None else interactive
+    if not os.path.exists(history_path):
         print("⚠️ No weight history file found.")
         return
 
-    if not games:
+    data = weight_evolution_data(history_path, personality, every, buckets)
+    if not data["games"]:
         print(f"⚠️ No history entries for personality: {personality}")
         return
 
-    plt.figure(figsize=(10, 5))
-    for trait, values in data.items():
-        plt.plot(games, values, label=trait, linewidth=2)
-
-    plt.title(f"🧬 Weight Evolution: '{personality}'")
-    plt.xlabel("Games Played")
-    plt.ylabel("Weight Value")
-    plt.ylim(0, 1.05)
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
-
-    if export:
-        filepath = get_timestamped_path(f"weight_evolution_{personality}", folder=out_folder)
-        plt.savefig(filepath)
-        open_file(filepath)
+    fig, ax = plt.subplots(figsize=(10, 5))
+    if buckets:
+        for trait, band in data["bands"].items():
+            ax.fill_between(data["games"], band["low"], band["high"], label=trait, alpha=0.5, step="post")
+    else:
+        for trait, values in data["weights"].items():
+            ax.plot(data["games"], values, label=trait, linewidth=2)
+
+    ax.set_title(f"🧬 Weight Evolution: '{personality}'")
+    ax.set_xlabel("Games Played")
+    ax.set_ylabel("Weight Value")
+    ax.set_ylim(0, 1.05)
+    ax.legend()
+    ax.grid(True)
+    fig.tight_layout()
+
+    filepath = get_timestamped_path(f"weight_evolution_{personality}", folder=out_folder) if export else None
+    finish_figure(fig, filepath, interactive)
+    if filepath:
         print(f"📦 Weight evolution chart saved to {filepath}")
-    plt.show()
@@ -0,0 +1,154 @@
+import json
+import os
+import shutil
+from array import array
+from math import ceil, nan
+
+from personality_manager import write_json_atomic
+
+COLUMNS_SUFFIX = ".columns"
+# Column files per personality: the game numbers as 64-bit ints and one file of doubles per weight
+GAME_COLUMN = ("game", "q")
+WEIGHT_TYPECODE = "d"
+
+
+class WeightHistory:
+    # weight_history.json is an append-only log with one JSON entry per line: {"personality", "game", "weights"}.
+    # Beside it, <path>.columns/ holds every personality's game numbers and weight values as flat binary columns,
+    # plus meta.json with how many bytes of the log they cover. Every read first indexes whatever was appended
+    # since (parsing only that tail), then loads the one personality's columns, so a series costs time in
+    # proportion to its own length rather than to the whole log. A weight missing from an entry, e.g. one added
+    # to a personality later, reads as NaN. A read_only history never indexes: it reads the columns as the last
+    # sync left them, so several processes can read one index that a single writer keeps up to date.
+
+    def __init__(self, path="weight_history.json", read_only=False):
+        self.path = path
+        self.read_only = read_only
+        self.columns_dir = path + COLUMNS_SUFFIX
+        self.meta_path = os.path.join(self.columns_dir, "meta.json")
+
+    def append(self, personality, game, weights, timestamp=None):
+        entry = {"personality": personality, "game": game, "weights": weights}
+        if timestamp:
+            entry["timestamp"] = timestamp
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def column_path(self, personality, name):
+        return os.path.join(self.columns_dir, f"{personality}--{name}.bin")
+
+    def load_meta(self):
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r") as f:
+                return json.load(f)
+        return {"covered": 0, "personalities": {}}
+
+    def sync(self):
+        # Brings the columns up to date with the log and returns the metadata
+        meta = self.load_meta()
+        if not os.path.exists(self.path):
+            return meta
+        size = os.path.getsize(self.path)
+        if size < meta["covered"]:
+            # The log was replaced or truncated: index it from scratch
+            shutil.rmtree(self.columns_dir, ignore_errors=True)
+            meta = {"covered": 0, "personalities": {}}
+        if size == meta["covered"]:
+            return meta
+
+        pending = {}
+        covered = meta["covered"]
+        with open(self.path, "rb") as f:
+            f.seek(covered)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # an entry still being written; the next sync picks it up
+                covered += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self._add_row(meta, pending, entry)
+
+        os.makedirs(self.columns_dir, exist_ok=True)
+        for personality, rows in pending.items():
+            self._write_column(personality, GAME_COLUMN, rows["start"], rows["games"])
+            for name, values in rows["weights"].items():
+                self._write_column(personality, (name, WEIGHT_TYPECODE), rows["start"], values)
+        # Columns first, then the metadata that makes them count: a crash in between only repeats the tail
+        meta["covered"] = covered
+        write_json_atomic(self.meta_path, meta)
+        return meta
+
+    def _add_row(self, meta, pending, entry):
+        personality = entry["personality"]
+        info = meta["personalities"].setdefault(personality, {"rows": 0, "weights": []})
+        if personality not in pending:
+            pending[personality] = {"start": info["rows"], "games": array(GAME_COLUMN[1]), "weights": {}}
+        rows = pending[personality]
+        weights = entry["weights"]
+        for name in weights:
+            if name not in info["weights"]:
+                info["weights"].append(name)
+        columns = rows["weights"]
+        for name in info["weights"]:
+            if name not in columns:
+                columns[name] = array(WEIGHT_TYPECODE, [nan] * len(rows["games"]))
+            columns[name].append(weights.get(name, nan))
+        rows["games"].append(entry["game"])
+        info["rows"] += 1
+
+    def _write_column(self, personality, column, start, values):
+        # Writes values from row `start` on, padding with NaN a weight column that starts later than the others
+        name, typecode = column
+        path = self.column_path(personality, name)
+        itemsize = array(typecode).itemsize
+        with open(path, "r+b" if os.path.exists(path) else "w+b") as f:
+            f.seek(0, os.SEEK_END)
+            existing = min(f.tell() // itemsize, start)
+            f.seek(existing * itemsize)
+            array(typecode, [nan] * (start - existing)).tofile(f)
+            values.tofile(f)
+            f.truncate()
+
+    def load(self, personality):
+        # (games, {weight: values}) as arrays, all of the same length
+        meta = self.load_meta() if self.read_only else self.sync()
+        info = meta["personalities"].get(personality)
+        if info is None:
+            return array(GAME_COLUMN[1]), {}
+        games = self._read_column(personality, GAME_COLUMN, info["rows"])
+        weights = {name: self._read_column(personality, (name, WEIGHT_TYPECODE), info["rows"])
+                   for name in info["weights"]}
+        return games, weights
+
+    def _read_column(self, personality, column, rows):
+        name, typecode = column
+        values = array(typecode)
+        with open(self.column_path(personality, name), "rb") as f:
+            values.fromfile(f, rows)
+        return values
+
+    def series(self, personality, every=None, max_points=None):
+        # Every Nth snapshot, or with max_points the smallest step that keeps at most that many
+        games, weights = self.load(personality)
+        if every is None:
+            every = max(1, ceil(len(games) / max_points)) if max_points else 1
+        step = slice(None, None, every)
+        return list(games[step]), {name: list(values[step]) for name, values in weights.items()}
+
+    def buckets(self, personality, count):
+        # Splits the series into about `count` buckets of consecutive snapshots and returns the first game of each
+        # bucket with each weight's (lows, highs) per bucket, so a plot keeps every spike a thinned series would drop
+        games, weights = self.load(personality)
+        size = max(1, ceil(len(games) / count))
+        starts = range(0, len(games), size)
+        bands = {}
+        for name, values in weights.items():
+            lows, highs = [], []
+            for start in starts:
+                bucket = [value for value in values[start:start + size] if value == value] or [nan]
+                lows.append(min(bucket))
+                highs.append(max(bucket))
+            bands[name] = (lows, highs)
+        return [games[start] for start in starts], bands
@@ -0,0 +1,32 @@
+import random
+
+# Fixed seed so keys are identical in every process (worker pools share table entries by key)
+_rng = random.Random(0x5EED)
+
+PIECE_KEYS = [[_rng.getrandbits(64) for _ in range(64)] for _ in range(16)]
+SIDE_KEYS = {"w": 0, "b": _rng.getrandbits(64)}
+# Indexed by the 4-bit castling rights mask and by the file of the en passant square
+CASTLING_KEYS = [0] + [_rng.getrandbits(64) for _ in range(15)]
+EP_KEYS = [_rng.getrandbits(64) for _ in range(8)]
+
+
+def compute_key(board):
+    key = CASTLING_KEYS[board.castling]
+    if board.ep_square is not None:
+        key ^= EP_KEYS[board.ep_square & 7]
+    for code, squares in board.pieces.items():
+        for sq in squares:
+            key ^= PIECE_KEYS[code][sq]
+    return key
+
+
+def compute_pawn_key(board, pawn_codes):
+    key = 0
+    for code in pawn_codes:
+        for sq in board.pieces[code]:
+            key ^= PIECE_KEYS[code][sq]
+    return key
+
+
+def position_key(board, color):
+    return board.hash ^ SIDE_KEYS[color]
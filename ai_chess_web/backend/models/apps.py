@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class ChessModelsConfig(AppConfig):
+    name = "ai_chess_web.backend.models"
+    label = "chess"
+    default_auto_field = "django.db.models.BigAutoField"
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 from ai_chess_web.backend.models.personality import Personality
 
@@ -6,4 +7,19 @@ from ai_chess_web.backend.models.personality import Personality
 class GameResult(models.Model):
     personality = models.ForeignKey(Personality, on_delete=models.CASCADE)
     result = models.CharField(max_length=10, choices=[("win", "Win"), ("loss", "Loss"), ("draw", "Draw")])
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Opponent and colour of self-play games; empty for results recorded without them
+    opponent = models.ForeignKey(Personality, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    color = models.CharField(max_length=1, blank=True, choices=[("w", "White"), ("b", "Black")])
+    # A default rather than auto_now_add, which would overwrite the original time of backfilled games
+    timestamp = models.DateTimeField(default=timezone.now)
+    # Identifies the game a row came from (tournament id and journal game id for self-play), so storing the same
+    # game again, live or by a backfill, adds nothing; empty for results recorded without one
+    game_key = models.CharField(max_length=200, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["personality", "timestamp"], name="gameresult_personality_time"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["game_key", "color"], name="gameresult_unique_game_side"),
+        ]
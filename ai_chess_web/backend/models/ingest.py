@@ -0,0 +1,190 @@
+import json
+import os
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from ai_chess_web.backend.models.game_result import GameResult
+from ai_chess_web.backend.models.personality import Personality
+from ai_chess_web.backend.models.summary import apply_results
+from ai_chess_web.backend.engine.personality_utils import personality_result
+from ai_chess_web.backend.models.weight_snapshot import WeightSnapshot
+
+# Rows per INSERT statement, and rows buffered before they are written
+BATCH_SIZE = 1000
+STAT_RESULTS = {"wins": "win", "losses": "loss", "draws": "draw"}
+
+
+def parse_timestamp(value):
+    if not value:
+        return None
+    parsed = parse_datetime(value) if isinstance(value, str) else value
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def read_jsonl(path):
+    # One JSON object per line; blank lines and a line cut short by a crash are skipped
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def game_key(tournament, game_id):
+    # The GameResult.game_key of a self-play game: its tournament plus its id in that tournament's journal
+    return f"{tournament}/{game_id}"
+
+
+class ResultIngestor:
+    # Buffers GameResult and WeightSnapshot rows and writes them with bulk_create, one transaction per flush, so
+    # a tournament's results cost one INSERT per batch instead of one per row. The same transaction folds the
+    # results into PersonalitySummary. Rows already stored (results by game_key, snapshots by personality and
+    # game number) are skipped, so ingesting a game twice, live and again by a backfill, counts it once.
+    # Use it as a context manager, or call flush() when done.
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.personalities = {}
+        self.results = []
+        self.snapshots = []
+        self.written = {"results": 0, "snapshots": 0, "skipped": 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.flush()
+
+    def personality(self, name):
+        if name not in self.personalities:
+            self.personalities[name], _ = Personality.objects.get_or_create(name=name)
+        return self.personalities[name]
+
+    def add_result(self, personality, result, opponent=None, color="", timestamp=None, key=None):
+        row = GameResult(personality=self.personality(personality), result=result,
+                         opponent=self.personality(opponent) if opponent else None, color=color, game_key=key)
+        if timestamp is not None:
+            row.timestamp = timestamp
+        self.results.append(row)
+        if len(self.results) >= self.batch_size:
+            self.flush()
+
+    def add_game(self, record, tournament=None):
+        # A finished game as the tournament scheduler journals it, stored as one row per side. Records name their
+        # tournament; `tournament` stands in for journals written before they did.
+        timestamp = parse_timestamp(record.get("timestamp"))
+        tournament = record.get("tournament", tournament)
+        key = game_key(tournament, record["id"]) if tournament and "id" in record else None
+        white, black = record["white"], record["black"]
+        for color, player, opponent in (("w", white, black), ("b", black, white)):
+            self.add_result(player, personality_result(record["result"], color), opponent, color, timestamp, key)
+
+    def add_snapshot(self, personality, game_number, weights, timestamp=None):
+        row = WeightSnapshot(personality=self.personality(personality), game_number=game_number, weights=weights)
+        if timestamp is not None:
+            row.timestamp = timestamp
+        self.snapshots.append(row)
+        if len(self.snapshots) >= self.batch_size:
+            self.flush()
+
+    def new_results(self):
+        # Drops rows whose game and side are stored already or earlier in the buffer. Only the rest reach
+        # apply_results, so the summaries never count a game twice.
+        stored = set(GameResult.objects.filter(game_key__in={row.game_key for row in self.results if row.game_key})
+                     .values_list("game_key", "color"))
+        results = []
+        for row in self.results:
+            if row.game_key is not None:
+                if (row.game_key, row.color) in stored:
+                    continue
+                stored.add((row.game_key, row.color))
+            results.append(row)
+        return results
+
+    def new_snapshots(self):
+        stored = set(WeightSnapshot.objects.filter(personality__in={row.personality_id for row in self.snapshots},
+                                                   game_number__in={row.game_number for row in self.snapshots})
+                     .values_list("personality_id", "game_number"))
+        snapshots = []
+        for row in self.snapshots:
+            if (row.personality_id, row.game_number) not in stored:
+                stored.add((row.personality_id, row.game_number))
+                snapshots.append(row)
+        return snapshots
+
+    def flush(self):
+        if not self.results and not self.snapshots:
+            return
+        with transaction.atomic():
+            results, snapshots = self.new_results(), self.new_snapshots()
+            # The unique constraint settles a race with another ingester storing the same game
+            GameResult.objects.bulk_create(results, batch_size=self.batch_size, ignore_conflicts=True)
+            apply_results(results)
+            WeightSnapshot.objects.bulk_create(snapshots, batch_size=self.batch_size)
+        self.written["results"] += len(results)
+        self.written["snapshots"] += len(snapshots)
+        self.written["skipped"] += len(self.results) - len(results) + len(self.snapshots) - len(snapshots)
+        self.results, self.snapshots = [], []
+
+    def recorder(self, manager=None):
+        # on_result callback for TournamentScheduler.run: stores every finished game and, given the run's
+        # PersonalityManager, a snapshot of both players' weights after it
+        def on_result(record):
+            self.add_game(record)
+            if manager is not None:
+                for name in (record["white"], record["black"]):
+                    self.add_snapshot(name, sum(manager.stats[name].values()), dict(manager.get_weights(name)),
+                                      parse_timestamp(record.get("timestamp")))
+        return on_result
+
+
+def journal_tournament(path):
+    # The tournament id the scheduler gives a journal's games: the journal's file name without extension
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def ingest_journal(path, ingestor):
+    # Tournament journals: one finished game per line
+    count = 0
+    for record in read_jsonl(path):
+        if "white" in record and "result" in record:
+            ingestor.add_game(record, journal_tournament(path))
+            count += 1
+    return count
+
+
+def ingest_weight_history(path, ingestor):
+    # weight_history.json: {"personality", "game", "weights"[, "timestamp"]} per line
+    count = 0
+    for entry in read_jsonl(path):
+        ingestor.add_snapshot(entry["personality"], entry["game"], entry["weights"],
+                              parse_timestamp(entry.get("timestamp")))
+        count += 1
+    return count
+
+
+def ingest_stats(path, ingestor):
+    # stats.json only holds totals, so each counted game becomes a result without opponent, dated by the file.
+    # The totals only grow, so the n-th win of a personality keeps its key and a later stats.json adds just the
+    # games counted since.
+    with open(path, "r") as f:
+        stats = json.load(f)
+    timestamp = datetime.fromtimestamp(os.path.getmtime(path), dt_timezone.utc)
+    count = 0
+    for personality, counts in stats.items():
+        for key, result in STAT_RESULTS.items():
+            for number in range(counts.get(key, 0)):
+                ingestor.add_result(personality, result, timestamp=timestamp,
+                                    key=f"stats/{personality}/{result}/{number}")
+                count += 1
+    return count
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from ai_chess_web.backend.models.ingest import BATCH_SIZE, ResultIngestor, ingest_journal, ingest_stats, \
+    ingest_weight_history
+
+
+class Command(BaseCommand):
+    help = "Load game results and weight snapshots from tournament journals, weight_history.json and stats.json"
+
+    def add_arguments(self, parser):
+        parser.add_argument("journals", nargs="*", help="tournament journal files (JSONL)")
+        parser.add_argument("--weight-history", action="append", default=[], help="weight history file (JSONL)")
+        parser.add_argument("--stats", help="stats.json; its totals become results without opponent")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        with ResultIngestor(options["batch_size"]) as ingestor:
+            for path in options["journals"]:
+                games = ingest_journal(path, ingestor)
+                self.stdout.write(f"{path}: {games} games")
+            for path in options["weight_history"]:
+                snapshots = ingest_weight_history(path, ingestor)
+                self.stdout.write(f"{path}: {snapshots} weight snapshots")
+            if options["stats"]:
+                results = ingest_stats(options["stats"], ingestor)
+                self.stdout.write(f"{options['stats']}: {results} results")
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {ingestor.written['results']} game results and {ingestor.written['snapshots']} weight snapshots, "
+            f"skipped {ingestor.written['skipped']} already stored"))
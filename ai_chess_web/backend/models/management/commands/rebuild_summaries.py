@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from ai_chess_web.backend.models.summary import REBUILD_CHUNK, rebuild_summaries, summary_report
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-personality summaries (counts, windowed win rate, Elo) from all game results"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=REBUILD_CHUNK)
+
+    def handle(self, *args, **options):
+        count = rebuild_summaries(options["chunk_size"])
+        for row in summary_report():
+            self.stdout.write(f"{row['personality']:<14} {row['games']:>7} games  {row['win_rate']:>6}% "
+                              f"(last {row['recent_win_rate']:>6}%)  Elo {row['rating']:>7}")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} summaries"))
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Personality',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GameResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('result', models.CharField(choices=[('win', 'Win'), ('loss', 'Loss'), ('draw', 'Draw')], max_length=10)),
+                ('color', models.CharField(blank=True, choices=[('w', 'White'), ('b', 'Black')], max_length=1)),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('opponent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='chess.personality')),
+                ('personality', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='chess.personality')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['personality', 'timestamp'], name='gameresult_personality_time')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WeightSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game_number', models.IntegerField()),
+                ('weights', models.JSONField()),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('personality', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='chess.personality')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['personality', 'game_number'], name='snapshot_personality_game'), models.Index(fields=['personality', 'timestamp'], name='snapshot_personality_time')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chess', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PersonalitySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('games', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('draws', models.IntegerField(default=0)),
+                ('recent', models.CharField(blank=True, default='', max_length=100)),
+                ('rating', models.FloatField(default=1500.0)),
+                ('rated_games', models.IntegerField(default=0)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('personality', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='chess.personality')),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chess', '0002_personalitysummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gameresult',
+            name='game_key',
+            field=models.CharField(blank=True, max_length=200, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='gameresult',
+            constraint=models.UniqueConstraint(fields=('game_key', 'color'), name='gameresult_unique_game_side'),
+        ),
+    ]
@@ -0,0 +1,7 @@
+# Django loads an app's models from its "models" module; this app keeps one model per file
+from ai_chess_web.backend.models.game_result import GameResult
+from ai_chess_web.backend.models.personality import Personality
+from ai_chess_web.backend.models.personality_summary import PersonalitySummary
+from ai_chess_web.backend.models.weight_snapshot import WeightSnapshot
+
+__all__ = ["GameResult", "Personality", "PersonalitySummary", "WeightSnapshot"]
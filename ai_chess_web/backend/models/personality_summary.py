@@ -0,0 +1,43 @@
+from django.db import models
+
+from ai_chess_web.backend.models.personality import Personality
+
+# Results kept for the windowed win rate
+WINDOW = 100
+INITIAL_RATING = 1500.0
+
+
+class PersonalitySummary(models.Model):
+    # Running totals per personality, updated as results are ingested, so reports read one row per personality
+    # instead of counting GameResult rows
+    personality = models.OneToOneField(Personality, on_delete=models.CASCADE, related_name="summary")
+    games = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    draws = models.IntegerField(default=0)
+    # The last WINDOW results, oldest first, as "w", "l" and "d" characters
+    recent = models.CharField(max_length=WINDOW, blank=True, default="")
+    rating = models.FloatField(default=INITIAL_RATING)
+    rated_games = models.IntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.personality}: {self.wins}/{self.losses}/{self.draws}, Elo {round(self.rating)}"
+
+    def record(self, result):
+        self.games += 1
+        if result == "win":
+            self.wins += 1
+        elif result == "loss":
+            self.losses += 1
+        else:
+            self.draws += 1
+        self.recent = (self.recent + result[0])[-WINDOW:]
+
+    @property
+    def win_rate(self):
+        return round(self.wins / self.games * 100, 2) if self.games else 0
+
+    @property
+    def recent_win_rate(self):
+        return round(self.recent.count("w") / len(self.recent) * 100, 2) if self.recent else 0
@@ -0,0 +1,67 @@
+from django.db import transaction
+
+from ai_chess_web.backend.models.game_result import GameResult
+from ai_chess_web.backend.models.personality_summary import PersonalitySummary
+
+# Elo step per game; every rated game moves both ratings by the same amount in opposite directions
+K_FACTOR = 20
+SCORES = {"win": 1.0, "draw": 0.5, "loss": 0.0}
+REBUILD_CHUNK = 5000
+
+
+def update_ratings(white, black, score):
+    # score: white's result, 1, 0.5 or 0
+    expected = 1 / (1 + 10 ** ((black.rating - white.rating) / 400))
+    change = K_FACTOR * (score - expected)
+    white.rating += change
+    black.rating -= change
+    white.rated_games += 1
+    black.rated_games += 1
+
+
+def apply_results(results):
+    # Folds GameResult rows, in the order played, into the summaries of everyone involved. Must run inside a
+    # transaction: the summary rows stay locked until it commits, so concurrent ingesters queue up rather than
+    # lose updates. Games are rated once, from white's row.
+    if not results:
+        return
+    ids = {row.personality_id for row in results} | {row.opponent_id for row in results if row.opponent_id}
+    PersonalitySummary.objects.bulk_create([PersonalitySummary(personality_id=pk) for pk in ids],
+                                           ignore_conflicts=True)
+    summaries = {summary.personality_id: summary
+                 for summary in PersonalitySummary.objects.select_for_update().filter(personality_id__in=ids)}
+    for row in results:
+        summaries[row.personality_id].record(row.result)
+        if row.opponent_id and row.color == "w":
+            update_ratings(summaries[row.personality_id], summaries[row.opponent_id], SCORES[row.result])
+    for summary in summaries.values():
+        summary.save()
+
+
+def rebuild_summaries(chunk_size=REBUILD_CHUNK):
+    # Recomputes every summary from GameResult, streaming the rows in playing order
+    with transaction.atomic():
+        PersonalitySummary.objects.all().delete()
+        chunk = []
+        for row in GameResult.objects.order_by("timestamp", "id").iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                apply_results(chunk)
+                chunk = []
+        apply_results(chunk)
+    return PersonalitySummary.objects.count()
+
+
+def summary_report():
+    # One query, one row per personality, best rated first
+    return [{
+        "personality": summary.personality.name,
+        "games": summary.games,
+        "wins": summary.wins,
+        "losses": summary.losses,
+        "draws": summary.draws,
+        "win_rate": summary.win_rate,
+        "recent_win_rate": summary.recent_win_rate,
+        "rating": round(summary.rating, 1),
+        "rated_games": summary.rated_games,
+    } for summary in PersonalitySummary.objects.select_related("personality").order_by("-rating")]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 from ai_chess_web.backend.models.personality import Personality
 
@@ -7,4 +8,11 @@ class WeightSnapshot(models.Model):
     personality = models.ForeignKey(Personality, on_delete=models.CASCADE)
     game_number = models.IntegerField()
     weights = models.JSONField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Settable, so backfilled snapshots keep their recorded time
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["personality", "game_number"], name="snapshot_personality_game"),
+            models.Index(fields=["personality", "timestamp"], name="snapshot_personality_time"),
+        ]
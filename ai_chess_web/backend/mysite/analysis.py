@@ -0,0 +1,208 @@
+import asyncio
+import json
+import math
+from collections import OrderedDict
+
+from django.conf import settings
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from ai import PERSONALITIES, SEARCH_TECHNIQUES
+from array_board import ArrayBoard, PIECE_CODES
+from engine_pool import EnginePool
+
+FINAL_EVENTS = ("result", "error")
+# Finished jobs are kept for late status requests, oldest dropped first
+MAX_FINISHED_JOBS = 1000
+
+
+class AnalysisJob:
+    # Event history of one search. Engine callbacks arrive on the pool's collector thread and are handed to the
+    # event loop, where every subscribed stream gets its own queue.
+
+    def __init__(self, job_id, loop):
+        self.job_id = job_id
+        self.loop = loop
+        self.events = []
+        self.subscribers = []
+        self.done = False
+
+    def push(self, kind, payload):
+        self.loop.call_soon_threadsafe(self.deliver, kind, payload)
+
+    def deliver(self, kind, payload):
+        self.events.append((kind, payload))
+        self.done = self.done or kind in FINAL_EVENTS
+        for queue in self.subscribers:
+            queue.put_nowait((kind, payload))
+
+    def subscribe(self):
+        queue = asyncio.Queue()
+        for event in self.events:
+            queue.put_nowait(event)
+        self.subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        if queue in self.subscribers:
+            self.subscribers.remove(queue)
+
+    def status(self):
+        status = {"job_id": self.job_id, "done": self.done,
+                  "iterations": [payload for kind, payload in self.events if kind == "info"]}
+        for kind, payload in self.events:
+            if kind in FINAL_EVENTS:
+                status[kind] = payload
+        return status
+
+
+class AnalysisHub:
+    # One engine pool per server process. Searches run in the pool's worker processes, so no request holds a
+    # thread while it waits; streams just await their queue.
+
+    def __init__(self, workers, tt_size_mb):
+        self.pool = EnginePool(workers, tt_size_mb=tt_size_mb)
+        self.jobs = OrderedDict()
+
+    def start(self, request, game_id=None):
+        job = AnalysisJob(None, asyncio.get_running_loop())
+
+        def on_done(kind, payload):
+            job.push(kind, payload)
+            job.loop.call_soon_threadsafe(self.forget_finished)
+
+        job.job_id = self.pool.submit(request, game_id, on_iteration=lambda info: job.push("info", info),
+                                      on_done=on_done)
+        self.jobs[job.job_id] = job
+        return job
+
+    def forget_finished(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def cancel(self, job_id):
+        return self.pool.cancel(job_id)
+
+
+_hub = None
+
+
+def get_hub():
+    global _hub
+    if _hub is None:
+        _hub = AnalysisHub(settings.ENGINE_WORKERS, settings.ENGINE_TT_SIZE_MB)
+    return _hub
+
+
+def get_job(job_id):
+    job = get_hub().jobs.get(job_id)
+    if job is None:
+        raise Http404(f"no analysis job {job_id}")
+    return job
+
+
+def check_list_board(board):
+    # Squares are piece names such as "wP", or blank
+    if not isinstance(board, list) or len(board) != 8 or any(not isinstance(row, list) or len(row) != 8
+                                                            for row in board):
+        raise ValueError("board must be a list of 8 rows of 8 squares")
+    for row in board:
+        for square in row:
+            if not isinstance(square, str) or (square not in PIECE_CODES and square.strip()):
+                raise ValueError(f"unknown square {square!r}")
+    return board
+
+
+def parse_analysis_request(payload):
+    # Accepts a full FEN (castling, en passant and clocks included), a FEN piece placement, or a board as
+    # 8 rows of "wP"/"  " style squares
+    if not isinstance(payload, dict):
+        raise ValueError("request body must be a JSON object")
+    if "fen" in payload:
+        if not isinstance(payload["fen"], str):
+            raise ValueError("fen must be a string")
+        board = ArrayBoard.from_fen(payload["fen"])
+        color = board.side
+    else:
+        color = payload.get("color", "w")
+        if color not in ("w", "b"):
+            raise ValueError("color must be 'w' or 'b'")
+        if "placement" in payload:
+            # A placement is the first field of a FEN, so it carries no castling rights or en passant square
+            if not isinstance(payload["placement"], str) or len(payload["placement"].split()) != 1:
+                raise ValueError("placement must be the piece placement field of a FEN")
+            board = ArrayBoard.from_fen(f"{payload['placement']} {color}")
+        else:
+            board = check_list_board(payload["board"])
+
+    personality = payload.get("personality", "machine")
+    if personality not in PERSONALITIES:
+        raise ValueError(f"unknown personality {personality!r}")
+    depth = int(payload.get("depth", 4))
+    if not 1 <= depth <= settings.ANALYSIS_MAX_DEPTH:
+        raise ValueError(f"depth must be between 1 and {settings.ANALYSIS_MAX_DEPTH}")
+    time_limit = float(payload.get("time_limit", settings.ANALYSIS_MAX_TIME))
+    if not math.isfinite(time_limit) or time_limit <= 0:
+        raise ValueError("time_limit must be a positive number of seconds")
+    time_limit = min(time_limit, settings.ANALYSIS_MAX_TIME)
+
+    request = {"board": board, "color": color, "depth": depth, "time_limit": time_limit,
+               "personality": personality}
+    for name in SEARCH_TECHNIQUES:
+        request[name] = bool(payload.get(name, False))
+    return request
+
+
+def format_event(kind, payload):
+    return f"event: {kind}\ndata: {json.dumps(payload)}\n\n"
+
+
+@csrf_exempt
+@require_POST
+async def start_analysis(request):
+    try:
+        payload = json.loads(request.body)
+        analysis_request = parse_analysis_request(payload)
+    except (ValueError, KeyError, TypeError) as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    job = get_hub().start(analysis_request, payload.get("game_id"))
+    return JsonResponse({"job_id": job.job_id, "events": f"/api/analysis/{job.job_id}/events/"}, status=202)
+
+
+@require_GET
+async def analysis_status(request, job_id):
+    return JsonResponse(get_job(job_id).status())
+
+
+@require_GET
+async def analysis_events(request, job_id):
+    # Server-sent events: one "info" event per finished iteration (depth, score, pv, nodes, nps), then a single
+    # "result" or "error" event
+    job = get_job(job_id)
+
+    async def stream():
+        queue = job.subscribe()
+        try:
+            while True:
+                kind, payload = await queue.get()
+                yield format_event(kind, payload)
+                if kind in FINAL_EVENTS:
+                    break
+        finally:
+            job.unsubscribe(queue)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@csrf_exempt
+@require_POST
+async def cancel_analysis(request, job_id):
+    job = get_job(job_id)
+    cancelled = not job.done and get_hub().cancel(job_id)
+    return JsonResponse({"job_id": job_id, "cancelled": cancelled}, status=202 if cancelled else 200)
@@ -10,11 +10,22 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# The engine modules import each other by bare module name
+ENGINE_DIR = BASE_DIR / 'engine'
+if str(ENGINE_DIR) not in sys.path:
+    sys.path.append(str(ENGINE_DIR))
+
+# The models package is imported by its full dotted path, ai_chess_web.backend.models
+REPO_DIR = BASE_DIR.parent.parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -37,6 +48,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'ai_chess_web.backend.models',
 ]
 
 MIDDLEWARE = [
@@ -123,3 +135,9 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Analysis API: engine worker processes started on the first request, and per-request search caps
+ENGINE_WORKERS = int(os.getenv("ENGINE_WORKERS", os.cpu_count() or 1))
+ENGINE_TT_SIZE_MB = int(os.getenv("ENGINE_TT_SIZE_MB", "16"))
+ANALYSIS_MAX_DEPTH = int(os.getenv("ANALYSIS_MAX_DEPTH", "8"))
+ANALYSIS_MAX_TIME = float(os.getenv("ANALYSIS_MAX_TIME", "30"))
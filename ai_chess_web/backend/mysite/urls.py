@@ -17,6 +17,12 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 
+from mysite import analysis
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/analysis/', analysis.start_analysis, name='start-analysis'),
+    path('api/analysis/<int:job_id>/', analysis.analysis_status, name='analysis-status'),
+    path('api/analysis/<int:job_id>/events/', analysis.analysis_events, name='analysis-events'),
+    path('api/analysis/<int:job_id>/cancel/', analysis.cancel_analysis, name='cancel-analysis'),
 ]